@@ -7,24 +7,38 @@
 ║  Pure Python 3.13+ GBA Emulator - No external dependencies                   ║
 ╚══════════════════════════════════════════════════════════════════════════════╝
 """
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import struct, time, json, zlib
+import struct, time, json, zlib, queue, threading, sys, os
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from array import array
 from collections import deque
 from dataclasses import dataclass
 from typing import Callable
 from enum import IntEnum, IntFlag
 from pathlib import Path
+try:import numpy as np
+except ImportError:np=None
+tk=ttk=filedialog=messagebox=None
+def _load_tk():
+    global tk,ttk,filedialog,messagebox
+    if tk is None:import tkinter as tk;from tkinter import ttk,filedialog,messagebox
 
 GBA_WIDTH, GBA_HEIGHT, SCALE = 240, 160, 3
 CYCLES_PER_SCANLINE, SCANLINES_PER_FRAME, VISIBLE_SCANLINES = 1232, 228, 160
+CPU_HZ = 16777216; GBA_REFRESH_HZ = CPU_HZ/(CYCLES_PER_SCANLINE*SCANLINES_PER_FRAME)
 BIOS_SIZE, EWRAM_SIZE, IWRAM_SIZE = 0x4000, 0x40000, 0x8000
 PALETTE_SIZE, VRAM_SIZE, OAM_SIZE, SRAM_SIZE = 0x400, 0x18000, 0x400, 0x10000
+ROW240, ROW160, PAL256, PAL255 = struct.Struct('<240H'), struct.Struct('<160H'), struct.Struct('<256H'), struct.Struct('<255H')
+FREE_THREADED = getattr(sys,'_is_gil_enabled',lambda:True)() is False
+OBJ_SIZES = [[(8,8),(16,16),(32,32),(64,64)],[(16,8),(32,8),(32,16),(64,32)],[(8,16),(8,32),(16,32),(32,64)],[(8,8),(8,8),(8,8),(8,8)]]
+def s16(v):return v-0x10000 if v&0x8000 else v
+def s28(v):v&=0xFFFFFFF;return v-0x10000000 if v&0x8000000 else v
 
 class Mem(IntEnum):
     BIOS=0;EWRAM=2;IWRAM=3;IO=4;PALETTE=5;VRAM=6;OAM=7;ROM0=8;ROM0H=9;ROM1=10;ROM1H=11;ROM2=12;ROM2H=13;SRAM=14
 class IO(IntEnum):
-    DISPCNT=0;DISPSTAT=4;VCOUNT=6;BG0CNT=8;BG1CNT=10;BG2CNT=12;BG3CNT=14;BG0HOFS=16;BG0VOFS=18;BG1HOFS=20;BG1VOFS=22;BG2HOFS=24;BG2VOFS=26;BG3HOFS=28;BG3VOFS=30;KEYINPUT=0x130;IE=0x200;IF=0x202;IME=0x208
+    DISPCNT=0;DISPSTAT=4;VCOUNT=6;BG0CNT=8;BG1CNT=10;BG2CNT=12;BG3CNT=14;BG0HOFS=16;BG0VOFS=18;BG1HOFS=20;BG1VOFS=22;BG2HOFS=24;BG2VOFS=26;BG3HOFS=28;BG3VOFS=30;BG2PA=0x20;BG2PB=0x22;BG2PC=0x24;BG2PD=0x26;BG2X=0x28;BG2Y=0x2C;BG3PA=0x30;BG3PB=0x32;BG3PC=0x34;BG3PD=0x36;BG3X=0x38;BG3Y=0x3C;WIN0H=0x40;WIN1H=0x42;WIN0V=0x44;WIN1V=0x46;WININ=0x48;WINOUT=0x4A;MOSAIC=0x4C;BLDCNT=0x50;BLDALPHA=0x52;BLDY=0x54;KEYINPUT=0x130;IE=0x200;IF=0x202;IME=0x208
 class Key(IntFlag):
     A=1;B=2;SELECT=4;START=8;RIGHT=16;LEFT=32;UP=64;DOWN=128;R=256;L=512
 class IRQ(IntFlag):
@@ -38,7 +52,7 @@ class MMU:
     def __init__(self):
         self.bios=bytearray(BIOS_SIZE);self.ewram=bytearray(EWRAM_SIZE);self.iwram=bytearray(IWRAM_SIZE)
         self.io_ram=bytearray(0x400);self.palette=bytearray(PALETTE_SIZE);self.vram=bytearray(VRAM_SIZE)
-        self.oam=bytearray(OAM_SIZE);self.rom=bytearray();self.sram=bytearray(SRAM_SIZE)
+        self.oam=bytearray(OAM_SIZE);self.rom=bytearray();self.sram=bytearray(SRAM_SIZE);self.on_keyinput_read=None;self.video_dirty=False
         self.bios_readable=True;struct.pack_into('<I',self.bios,0,0xEA00001E);struct.pack_into('<I',self.bios,0x80,0xE3A00302);struct.pack_into('<I',self.bios,0x84,0xE12FFF10)
     def load_rom(self,data):self.rom=bytearray(data);s=len(self.rom);self.rom.extend(bytes((1<<(s-1).bit_length())-s)) if s&(s-1) else None
     def load_bios(self,data):self.bios=bytearray(data[:BIOS_SIZE])
@@ -47,7 +61,7 @@ class MMU:
         if r==Mem.BIOS:return self.bios[a&0x3FFF] if self.bios_readable else 0
         if r==Mem.EWRAM:return self.ewram[a&0x3FFFF]
         if r==Mem.IWRAM:return self.iwram[a&0x7FFF]
-        if r==Mem.IO:return self.io_ram[a&0x3FF]
+        if r==Mem.IO:o=a&0x3FF;self.on_keyinput_read() if self.on_keyinput_read and o==IO.KEYINPUT else None;return self.io_ram[o]
         if r==Mem.PALETTE:return self.palette[a&0x3FF]
         if r==Mem.VRAM:o=a&0x1FFFF;return self.vram[o-0x8000 if o>=VRAM_SIZE else o]
         if r==Mem.OAM:return self.oam[a&0x3FF]
@@ -62,12 +76,18 @@ class MMU:
         elif r==Mem.IWRAM:self.iwram[a&0x7FFF]=v
         elif r==Mem.IO:self.io_ram[a&0x3FF]=v
         elif r==Mem.PALETTE:x=a&0x3FE;self.palette[x]=self.palette[x+1]=v
-        elif r==Mem.VRAM:o=a&0x1FFFF;o=o-0x8000 if o>=VRAM_SIZE else o;x=o&~1;self.vram[x]=self.vram[x+1]=v
+        elif r==Mem.VRAM:o=a&0x1FFFF;o=o-0x8000 if o>=VRAM_SIZE else o;x=o&~1;self.vram[x]=self.vram[x+1]=v;self.video_dirty=True
         elif r==Mem.SRAM:self.sram[a&0xFFFF]=v
-    def write16(self,a,v):a&=~1;v&=0xFFFF;self.write8(a,v&0xFF);self.write8(a+1,(v>>8)&0xFF)
-    def write32(self,a,v):a&=~3;v&=0xFFFFFFFF;self.write8(a,v&0xFF);self.write8(a+1,(v>>8)&0xFF);self.write8(a+2,(v>>16)&0xFF);self.write8(a+3,(v>>24)&0xFF)
+    def write16(self,a,v):
+        a&=~1;v&=0xFFFF;r=(a>>24)&0xFF
+        if r==Mem.PALETTE:x=a&0x3FE;self.palette[x]=v&0xFF;self.palette[x+1]=v>>8
+        elif r==Mem.VRAM:o=a&0x1FFFF;o=o-0x8000 if o>=VRAM_SIZE else o;self.vram[o]=v&0xFF;self.vram[o+1]=v>>8;self.video_dirty=True
+        elif r==Mem.OAM:x=a&0x3FE;self.oam[x]=v&0xFF;self.oam[x+1]=v>>8;self.video_dirty=True
+        else:self.write8(a,v&0xFF);self.write8(a+1,v>>8)
+    def write32(self,a,v):a&=~3;v&=0xFFFFFFFF;self.write16(a,v&0xFFFF);self.write16(a+2,v>>16)
     def get_io16(self,r):return self.io_ram[r]|(self.io_ram[r+1]<<8)
     def set_io16(self,r,v):self.io_ram[r]=v&0xFF;self.io_ram[r+1]=(v>>8)&0xFF
+    def get_io32(self,r):return self.get_io16(r)|(self.get_io16(r+2)<<16)
 
 class ARM7TDMI:
     def __init__(self,mmu):
@@ -362,67 +382,170 @@ class ARM7TDMI:
 
 class PPU:
     PALETTES={'gba':None,'original_gameboy':[(155,188,15),(139,172,15),(48,98,48),(15,56,15)],'gba_sp':[(248,248,248),(176,176,176),(104,104,104),(32,32,32)],'pink_dreams':[(255,218,233),(255,145,175),(199,80,120),(99,30,60)],'ocean_blue':[(224,248,255),(128,200,248),(48,128,200),(16,56,128)],'amber_glow':[(255,224,168),(248,176,88),(192,112,32),(96,48,0)]}
-    def __init__(self,mmu):self.mmu=mmu;self.framebuffer=bytearray(GBA_WIDTH*GBA_HEIGHT*3);self.scanline=[0]*GBA_WIDTH;self.layer_buffers=[[0x8000]*GBA_WIDTH for _ in range(6)];self.layer_priority=[[4]*GBA_WIDTH for _ in range(6)];self.layer_enable=[True]*8;self.palette_filter='gba'
+    def __init__(self,mmu):self.mmu=mmu;self._fbs=(bytearray(GBA_WIDTH*GBA_HEIGHT*3),bytearray(GBA_WIDTH*GBA_HEIGHT*3));self._views=tuple(memoryview(b).toreadonly() for b in self._fbs);self._back=0;self.framebuffer=self._fbs[0];self.front=self._views[1];self.frame_seq=0;self.on_swap=[];self.hold_swap=False;self.swap_due=False;self.scanline=array('H',bytes(GBA_WIDTH*2));self._blank_c=array('H',[0x8000])*GBA_WIDTH;self._blank_p=array('B',[4])*GBA_WIDTH;self._zero_p=array('B',bytes(GBA_WIDTH));self.layer_buffers=[array('H',self._blank_c) for _ in range(6)];self.layer_priority=[array('B',self._blank_p) for _ in range(6)];self.layer_enable=[True]*8;self.palette_filter='gba';self.rgb_lut=None;self._lut_filter=None;self._pal_key=None;self._pal16=None;self._pal_rgb=None;self.obj_semi=array('B',self._zero_p);self.obj_win=array('B',self._zero_p);self._obj_semi_any=False;self._blend_cache={};self.bg_ref=[[0,0],[0,0]];self._bg_ref_raw=[None,None];self._np_x=np.arange(GBA_WIDTH,dtype=np.int64) if np is not None else None
+    def swap_buffers(self):
+        if self.hold_swap:self.swap_due=True;return
+        self.swap_due=False;self.front=self._views[self._back];self._back^=1;self.framebuffer=self._fbs[self._back];self.frame_seq+=1
+        for f in self.on_swap:f(self.frame_seq,self.front)
     def rgb15_to_rgb24(self,c):return((c&0x1F)<<3,((c>>5)&0x1F)<<3,((c>>10)&0x1F)<<3)
     def apply_palette_filter(self,r,g,b):
         if self.palette_filter=='gba' or self.palette_filter not in self.PALETTES:return r,g,b
         p=self.PALETTES[self.palette_filter];return(r,g,b) if p is None else p[min(3,(r*299+g*587+b*114)//1000//64)]
+    def _build_lut(self):self._lut_filter=self.palette_filter;l=[bytes(self.apply_palette_filter(*self.rgb15_to_rgb24(c))) for c in range(0x8000)];self.rgb_lut=l+l;self._pal_key=None
+    def _palette_rgb(self):
+        k=bytes(self.mmu.palette[:0x200])
+        if k!=self._pal_key:self._pal_key=k;self._pal16=(0x8000,)+tuple(c&0x7FFF for c in PAL255.unpack_from(k,2));self._pal_rgb=list(map(self.rgb_lut.__getitem__,PAL256.unpack(k)))
+        return self._pal16,self._pal_rgb
+    def render_bitmap(self,mode,y,dc,direct):
+        vr=self.mmu.vram;fr=0xA000 if dc&0x10 and mode!=3 else 0;fb=self.framebuffer;fbo=y*GBA_WIDTH*3;lut=self.rgb_lut;lb=self.layer_buffers[2]
+        if mode==3:
+            row=ROW240.unpack_from(vr,y*480)
+            if direct:fb[fbo:fbo+720]=b''.join(map(lut.__getitem__,row))
+            else:lb[:]=array('H',[c&0x7FFF for c in row]);self.layer_priority[2][:]=self._zero_p
+        elif mode==4:
+            p16,prgb=self._palette_rgb();row=vr[fr+y*GBA_WIDTH:fr+(y+1)*GBA_WIDTH]
+            if direct:fb[fbo:fbo+720]=b''.join(map(prgb.__getitem__,row))
+            else:lb[:]=array('H',map(p16.__getitem__,row));self.layer_priority[2][:]=self._zero_p
+        else:
+            bd=lut[self.mmu.palette[0]|(self.mmu.palette[1]<<8)]
+            if y>=128:
+                if direct:fb[fbo:fbo+720]=bd*GBA_WIDTH
+                return
+            row=ROW160.unpack_from(vr,fr+y*320)
+            if direct:fb[fbo:fbo+720]=b''.join(map(lut.__getitem__,row))+bd*80
+            else:lb[:160]=array('H',[c&0x7FFF for c in row]);self.layer_priority[2][:160]=self._zero_p[:160]
     def get_bg_pixel(self,bg,x,y):
         bgc=self.mmu.get_io16(IO.BG0CNT+bg*2);cb=((bgc>>2)&3)*0x4000;sb=((bgc>>8)&0x1F)*0x800;cm=bool(bgc&0x80);ss=(bgc>>14)&3
         ho=self.mmu.get_io16(IO.BG0HOFS+bg*4)&0x1FF;vo=self.mmu.get_io16(IO.BG0VOFS+bg*4)&0x1FF
         w,h=[(256,256),(512,256),(256,512),(512,512)][ss];px=(x+ho)%w;py=(y+vo)%h;tx=px//8;ty=py//8;pixelx=px%8;pixely=py%8
-        sbl=0;sbl+=(tx//32) if w==512 else 0;tx%=32 if w==512 else tx;sbl+=(ty//32)*(2 if w==512 else 1) if h==512 else 0;ty%=32 if h==512 else ty
+        sbl=0;sbl+=(tx//32) if w==512 else 0;sbl+=(ty//32)*(2 if w==512 else 1) if h==512 else 0;tx&=31;ty&=31
         ta=sb+sbl*0x800+(ty*32+tx)*2;te=self.mmu.vram[ta]|(self.mmu.vram[ta+1]<<8);tn=te&0x3FF;hf=bool(te&0x400);vf=bool(te&0x800);pn=(te>>12)&0xF
         pixelx=7-pixelx if hf else pixelx;pixely=7-pixely if vf else pixely
         if cm:to=tn*64+pixely*8+pixelx;ci=self.mmu.vram[cb+to];return 0x8000 if ci==0 else self.mmu.palette[ci*2]|(self.mmu.palette[ci*2+1]<<8)
         else:to=tn*32+pixely*4+pixelx//2;b=self.mmu.vram[cb+to];ci=(b>>4) if pixelx&1 else(b&0xF);return 0x8000 if ci==0 else self.mmu.palette[pn*32+ci*2]|(self.mmu.palette[pn*32+ci*2+1]<<8)
+    def _affine_ref(self,i,y):
+        b=IO.BG2PA+i*0x10;raw=(self.mmu.get_io32(b+8),self.mmu.get_io32(b+12))
+        if y==0 or raw!=self._bg_ref_raw[i]:self._bg_ref_raw[i]=raw;self.bg_ref[i]=[s28(raw[0]),s28(raw[1])]
+        r=self.bg_ref[i];cx,cy=r;r[0]=cx+s16(self.mmu.get_io16(b+2));r[1]=cy+s16(self.mmu.get_io16(b+6));return cx,cy
+    def render_affine_bg(self,bg,cx,cy):
+        m=self.mmu;bgc=m.get_io16(IO.BG0CNT+bg*2);pr=bgc&3;cb=((bgc>>2)&3)*0x4000;sb=((bgc>>8)&0x1F)*0x800;wrap=bool(bgc&0x2000);sz=128<<((bgc>>14)&3);msk=sz-1;tw=sz>>3
+        b=IO.BG2PA+(bg-2)*0x10;pa=s16(m.get_io16(b));pc=s16(m.get_io16(b+4));p16,_=self._palette_rgb();lb=self.layer_buffers[bg];lp=self.layer_priority[bg];vr=m.vram
+        if np is not None:
+            tx=(cx+pa*self._np_x)>>8;ty=(cy+pc*self._np_x)>>8;ok=None if wrap else(tx>=0)&(ty>=0)&(tx<sz)&(ty<sz);tx&=msk;ty&=msk;nv=np.frombuffer(vr,dtype=np.uint8)
+            ci=nv[cb+nv[sb+(ty>>3)*tw+(tx>>3)].astype(np.int64)*64+(ty&7)*8+(tx&7)];ci=ci if ok is None else np.where(ok,ci,0)
+            lb[:]=array('H',np.asarray(p16,dtype=np.uint16)[ci].tobytes());lp[:]=array('B',[pr])*GBA_WIDTH;return
+        for x in range(GBA_WIDTH):
+            tx=cx>>8;ty=cy>>8;cx+=pa;cy+=pc
+            if wrap:tx&=msk;ty&=msk
+            elif tx<0 or ty<0 or tx>=sz or ty>=sz:continue
+            ci=vr[cb+vr[sb+(ty>>3)*tw+(tx>>3)]*64+(ty&7)*8+(tx&7)]
+            if ci:lb[x]=p16[ci];lp[x]=pr
+    def _obj_texel(self,tn,w,cm,om,pn,u,v):
+        tr=v//8;tc=u//8;pixelx=u%8;pixely=v%8;ti=tn+tr*(w//8)*(2 if cm else 1)+tc*(2 if cm else 1) if om else(tn+tc*(2 if cm else 1))+tr*32;ob=0x10000
+        if cm:off=ti*32+pixely*8+pixelx;ci=self.mmu.vram[ob+off] if ob+off<VRAM_SIZE else 0;return 0x200+ci*2 if ci else None
+        off=ti*32+pixely*4+pixelx//2;b=self.mmu.vram[ob+off] if ob+off<VRAM_SIZE else 0;ci=(b>>4) if pixelx&1 else(b&0xF);return 0x200+pn*32+ci*2 if ci else None
     def render_sprites(self,y):
-        for x in range(GBA_WIDTH):self.layer_buffers[4][x]=0x8000;self.layer_priority[4][x]=4
+        self.layer_buffers[4][:]=self._blank_c;self.layer_priority[4][:]=self._blank_p;self.obj_semi[:]=self._zero_p;self.obj_win[:]=self._zero_p;self._obj_semi_any=False
         if not self.layer_enable[4]:return
-        dc=self.mmu.get_io16(IO.DISPCNT);om=bool(dc&0x40)
+        dc=self.mmu.get_io16(IO.DISPCNT);om=bool(dc&0x40);oam=self.mmu.oam;lb=self.layer_buffers[4];lp=self.layer_priority[4];pal=self.mmu.palette;osm=self.obj_semi;ow=self.obj_win
+        mz=self.mmu.get_io16(IO.MOSAIC);mh=((mz>>8)&0xF)+1;mv=((mz>>12)&0xF)+1
         for i in range(127,-1,-1):
-            oa=i*8;a0=self.mmu.oam[oa]|(self.mmu.oam[oa+1]<<8);a1=self.mmu.oam[oa+2]|(self.mmu.oam[oa+3]<<8);a2=self.mmu.oam[oa+4]|(self.mmu.oam[oa+5]<<8)
-            if((a0>>8)&3)==2:continue
-            sy=a0&0xFF;sy-=256 if sy>=160 else 0;sh=(a0>>14)&3;sz=(a1>>14)&3;szs=[[(8,8),(16,16),(32,32),(64,64)],[(16,8),(32,8),(32,16),(64,32)],[(8,16),(8,32),(16,32),(32,64)],[(8,8),(8,8),(8,8),(8,8)]];w,h=szs[sh][sz]
-            if y<sy or y>=sy+h:continue
-            sx=a1&0x1FF;sx-=512 if sx>=240 else 0;hf=bool(a1&0x1000);vf=bool(a1&0x2000);tn=a2&0x3FF;pr=(a2>>10)&3;pn=(a2>>12)&0xF;cm=bool(a0&0x2000)
-            sl=y-sy;sl=h-1-sl if vf else sl
+            oa=i*8;a0=oam[oa]|(oam[oa+1]<<8);a1=oam[oa+2]|(oam[oa+3]<<8);a2=oam[oa+4]|(oam[oa+5]<<8);af=bool(a0&0x100)
+            if not af and a0&0x200:continue
+            sy=a0&0xFF;sy-=256 if sy>=160 else 0;w,h=OBJ_SIZES[(a0>>14)&3][(a1>>14)&3];bw,bh=(w*2,h*2) if af and a0&0x200 else(w,h)
+            if y<sy or y>=sy+bh:continue
+            sx=a1&0x1FF;sx-=512 if sx>=240 else 0;tn=a2&0x3FF;pr=(a2>>10)&3;pn=(a2>>12)&0xF;cm=bool(a0&0x2000);gm=(a0>>10)&3;gm=0 if gm==3 else gm;mo=bool(a0&0x1000)
+            if af:
+                g=((a1>>9)&0x1F)*32;pa=s16(oam[g+6]|(oam[g+7]<<8));pb=s16(oam[g+14]|(oam[g+15]<<8));pc=s16(oam[g+22]|(oam[g+23]<<8));pd=s16(oam[g+30]|(oam[g+31]<<8))
+                dx=-(bw//2);dy=y-sy-bh//2;tx=pa*dx+pb*dy+(w<<7);ty=pc*dx+pd*dy+(h<<7)
+                for px in range(bw):
+                    scx=sx+px;u=tx>>8;v=ty>>8;tx+=pa;ty+=pc
+                    if scx<0 or scx>=GBA_WIDTH or u<0 or v<0 or u>=w or v>=h or(gm!=2 and lp[scx]<pr):continue
+                    po=self._obj_texel(tn,w,cm,om,pn,u,v)
+                    if po is None:continue
+                    if gm==2:ow[scx]=1
+                    else:lb[scx]=pal[po]|(pal[po+1]<<8);lp[scx]=pr;osm[scx]=gm
+                continue
+            hf=bool(a1&0x1000);vf=bool(a1&0x2000);sl=max(0,y-y%mv-sy) if mo else y-sy;sl=h-1-sl if vf else sl
             for px in range(w):
                 scx=sx+px
-                if scx<0 or scx>=GBA_WIDTH:continue
-                if self.layer_priority[4][scx]<pr:continue
-                tpx=w-1-px if hf else px;tr=sl//8;tc=tpx//8;pixelx=tpx%8;pixely=sl%8
-                ti=tn+tr*(w//8)*(2 if cm else 1)+tc*(2 if cm else 1) if om else(tn+tc*(2 if cm else 1))+tr*32
-                ob=0x10000
-                if cm:off=ti*32+pixely*8+pixelx;ci=self.mmu.vram[ob+off] if ob+off<VRAM_SIZE else 0;po=0x200+ci*2 if ci else None
-                else:off=ti*32+pixely*4+pixelx//2;b=self.mmu.vram[ob+off] if ob+off<VRAM_SIZE else 0;ci=(b>>4) if pixelx&1 else(b&0xF);po=0x200+pn*32+ci*2 if ci else None
+                if scx<0 or scx>=GBA_WIDTH or(gm!=2 and lp[scx]<pr):continue
+                tx=max(0,scx-scx%mh-sx) if mo else px;po=self._obj_texel(tn,w,cm,om,pn,w-1-tx if hf else tx,sl)
                 if po is None:continue
-                c=self.mmu.palette[po]|(self.mmu.palette[po+1]<<8);self.layer_buffers[4][scx]=c;self.layer_priority[4][scx]=pr
+                if gm==2:ow[scx]=1
+                else:lb[scx]=pal[po]|(pal[po+1]<<8);lp[scx]=pr;osm[scx]=gm
+            self._obj_semi_any=self._obj_semi_any or gm==1
+    def _mosaic_row(self,l,mh):
+        lb=self.layer_buffers[l];lp=self.layer_priority[l]
+        for x in range(0,GBA_WIDTH,mh):n=min(mh,GBA_WIDTH-x);lb[x:x+n]=array('H',[lb[x]])*n;lp[x:x+n]=array('B',[lp[x]])*n
+    def _window_mask(self,y,dc):
+        m=self.mmu;wi=m.get_io16(IO.WININ);wo=m.get_io16(IO.WINOUT);mk=[wo&0x3F]*GBA_WIDTH
+        if(dc&0x9000)==0x9000:e=(wo>>8)&0x3F;mk=[e if f else o for f,o in zip(self.obj_win,mk)]
+        for w in(1,0):
+            if not dc&(0x2000<<w):continue
+            h=m.get_io16(IO.WIN0H+w*2);v=m.get_io16(IO.WIN0V+w*2);x1=min(h>>8,GBA_WIDTH);x2=min(h&0xFF,GBA_WIDTH);y1=v>>8;y2=min(v&0xFF,GBA_HEIGHT)
+            if not(y1<=y<y2 if y1<=y2 else(y>=y1 or y<y2)):continue
+            e=[(wi>>(w*8))&0x3F]
+            if x1<=x2:mk[x1:x2]=e*(x2-x1)
+            else:mk[x1:]=e*(GBA_WIDTH-x1);mk[:x2]=e*x2
+        return mk
+    def _blend_tab(self,md,a,b):
+        k=(md,a,b);t=self._blend_cache.get(k)
+        if t is None:t=self._blend_cache[k]=[min(31,(c*a+d*b)>>4) for c in range(32) for d in range(32)] if md==1 else[c+(((31-c)*a)>>4) for c in range(32)] if md==2 else[c-((c*a)>>4) for c in range(32)]
+        return t
+    def composite(self,y,dc,bd,layers,prio):
+        m=self.mmu;bc=m.get_io16(IO.BLDCNT);md=(bc>>6)&3;mk=self._window_mask(y,dc) if dc&0xE000 else None;lbs=self.layer_buffers;ob=lbs[4];obp=self.layer_priority[4];obj=bool(dc&0x1000)
+        order=sorted(layers,key=lambda l:(prio[l],l))
+        if md==0 and not(obj and self._obj_semi_any):
+            row=[bd]*GBA_WIDTH;rp=[4]*GBA_WIDTH
+            for bg in reversed(order):L=lbs[bg] if mk is None else[c if e>>bg&1 else 0x8000 for c,e in zip(lbs[bg],mk)];p=prio[bg];rp=[p if c!=0x8000 else q for c,q in zip(L,rp)];row=[c if c!=0x8000 else r for c,r in zip(L,row)]
+            if obj:O=ob if mk is None else[c if e&0x10 else 0x8000 for c,e in zip(ob,mk)];row=[o if o!=0x8000 and op<=q else r for o,op,q,r in zip(O,obp,rp,row)]
+            return row
+        t1=bc&0x3F;t2=(bc>>8)&0x3F;ba=m.get_io16(IO.BLDALPHA);at=self._blend_tab(1,min(16,ba&0x1F),min(16,(ba>>8)&0x1F));bt=self._blend_tab(md,min(16,m.get_io16(IO.BLDY)&0x1F),0) if md>=2 else None
+        lay=[(bg,prio[bg],lbs[bg]) for bg in order];osm=self.obj_semi;out=[bd]*GBA_WIDTH
+        for x in range(GBA_WIDTH):
+            e=mk[x] if mk else 0x3F;o=ob[x] if obj and e&0x10 else 0x8000;op=obp[x];c1=c2=bd;l1=l2=5;n=0
+            for bg,p,L in lay:
+                c=L[x]
+                if c==0x8000 or not e>>bg&1:continue
+                if o!=0x8000 and op<=p:
+                    if n:c2=o;l2=4;n=2;break
+                    c1=o;l1=4;n=1;o=0x8000
+                if n:c2=c;l2=bg;n=2;break
+                c1=c;l1=bg;n=1
+            else:
+                if o!=0x8000:
+                    if n:c2=o;l2=4
+                    else:c1=o;l1=4
+            if e&0x20:
+                if(md==1 or(l1==4 and osm[x])) and t2>>l2&1 and(t1>>l1&1 or l1==4 and osm[x]):c1=at[((c1&31)<<5)|(c2&31)]|(at[(c1&0x3E0)|((c2>>5)&31)]<<5)|(at[((c1>>5)&0x3E0)|((c2>>10)&31)]<<10)
+                elif bt and t1>>l1&1:c1=bt[c1&31]|(bt[(c1>>5)&31]<<5)|(bt[(c1>>10)&31]<<10)
+            out[x]=c1
+        return out
     def render_scanline(self,y):
-        dc=self.mmu.get_io16(IO.DISPCNT);mode=dc&7;bd=self.mmu.palette[0]|(self.mmu.palette[1]<<8)
-        for l in range(6):
-            for x in range(GBA_WIDTH):self.layer_buffers[l][x]=0x8000;self.layer_priority[l][x]=4
-        for x in range(GBA_WIDTH):self.layer_buffers[5][x]=bd;self.layer_priority[5][x]=4
-        if mode==0:
-            for bg in range(4):
+        m=self.mmu;dc=m.get_io16(IO.DISPCNT);mode=dc&7;bd=m.palette[0]|(m.palette[1]<<8);bm=mode in(3,4,5) and bool(dc&0x400) and self.layer_enable[2]
+        if self._lut_filter!=self.palette_filter:self._build_lut()
+        if bm and(dc&0xFF00)==0x400 and not m.get_io16(IO.BLDCNT)&0xC0 and not m.get_io16(IO.BG2CNT)&0x40:self.render_bitmap(mode,y,dc,True);return
+        for l in range(6):self.layer_buffers[l][:]=self._blank_c;self.layer_priority[l][:]=self._blank_p
+        self.layer_buffers[5][:]=array('H',[bd])*GBA_WIDTH
+        mz=m.get_io16(IO.MOSAIC);mh=(mz&0xF)+1;mv=((mz>>4)&0xF)+1;layers=[];prio=[m.get_io16(IO.BG0CNT+bg*2)&3 for bg in range(4)]
+        if mode<=2:
+            for bg in((0,1,2,3),(0,1),())[mode]:
                 if(dc&(0x100<<bg)) and self.layer_enable[bg]:
-                    bgc=self.mmu.get_io16(IO.BG0CNT+bg*2);pr=bgc&3
-                    for x in range(GBA_WIDTH):c=self.get_bg_pixel(bg,x,y);self.layer_buffers[bg][x]=c if c!=0x8000 else self.layer_buffers[bg][x];self.layer_priority[bg][x]=pr if c!=0x8000 else self.layer_priority[bg][x]
-        elif mode==3:
-            if self.layer_enable[2]:
-                for x in range(GBA_WIDTH):off=(y*GBA_WIDTH+x)*2;c=self.mmu.vram[off]|(self.mmu.vram[off+1]<<8);self.layer_buffers[2][x]=c;self.layer_priority[2][x]=0
-        elif mode==4:
-            if self.layer_enable[2]:
-                fr=0xA000 if dc&0x10 else 0
-                for x in range(GBA_WIDTH):off=fr+y*GBA_WIDTH+x;ci=self.mmu.vram[off];c=self.mmu.palette[ci*2]|(self.mmu.palette[ci*2+1]<<8) if ci>0 else 0x8000;self.layer_buffers[2][x]=c if c!=0x8000 else self.layer_buffers[2][x];self.layer_priority[2][x]=0 if c!=0x8000 else self.layer_priority[2][x]
+                    bgc=m.get_io16(IO.BG0CNT+bg*2);pr=bgc&3;yy=y-y%mv if bgc&0x40 else y;layers.append(bg)
+                    lb=self.layer_buffers[bg];gp=self.get_bg_pixel;self.layer_priority[bg][:]=array('B',[pr])*GBA_WIDTH
+                    for x in range(GBA_WIDTH):lb[x]=gp(bg,x,yy)
+                    if bgc&0x40 and mh>1:self._mosaic_row(bg,mh)
+            for bg in((),(2,),(2,3))[mode]:
+                cx,cy=self._affine_ref(bg-2,y)
+                if(dc&(0x100<<bg)) and self.layer_enable[bg]:
+                    self.render_affine_bg(bg,cx,cy);layers.append(bg)
+                    if m.get_io16(IO.BG0CNT+bg*2)&0x40 and mh>1:self._mosaic_row(bg,mh)
+        elif bm:
+            mo=m.get_io16(IO.BG2CNT)&0x40;self.render_bitmap(mode,y-y%mv if mo else y,dc,False);layers.append(2)
+            if mo and mh>1:self._mosaic_row(2,mh)
         if dc&0x1000:self.render_sprites(y)
-        for x in range(GBA_WIDTH):
-            bc=self.layer_buffers[5][x];bp=4
-            for l in[0,1,2,3,4]:
-                if self.layer_buffers[l][x]!=0x8000 and self.layer_priority[l][x]<=bp:bp=self.layer_priority[l][x];bc=self.layer_buffers[l][x]
-            self.scanline[x]=bc
-        fbo=y*GBA_WIDTH*3
-        for x in range(GBA_WIDTH):r,g,b=self.rgb15_to_rgb24(self.scanline[x]);r,g,b=self.apply_palette_filter(r,g,b);self.framebuffer[fbo+x*3]=r;self.framebuffer[fbo+x*3+1]=g;self.framebuffer[fbo+x*3+2]=b
+        row=self.composite(y,dc,bd,layers,prio);self.scanline[:]=array('H',row);fbo=y*GBA_WIDTH*3;self.framebuffer[fbo:fbo+GBA_WIDTH*3]=b''.join(map(self.rgb_lut.__getitem__,row))
 
 @dataclass
 class Cheat:
@@ -468,21 +591,142 @@ class SaveStateManager:
     def load_from_file(self,p,s):
         try:self.states[s]=zlib.decompress(open(p,'rb').read());return self.load_state(s)
         except:return False
-    def update_rewind(self):self.frame_counter+=1;self.rewind_buffer.append(self._capture()) if self.frame_counter>=1 else None;self.frame_counter=0
+    def update_rewind(self,interval=1):
+        self.frame_counter+=1
+        if self.frame_counter>=interval:self.rewind_buffer.append(self._capture());self.frame_counter=0
     def rewind(self,f=1):
         if len(self.rewind_buffer)<f:return False
         for _ in range(f):self.rewind_buffer.pop() if self.rewind_buffer else None
         if self.rewind_buffer:self._restore(self.rewind_buffer[-1]);return True
         return False
+    def snapshot(self):
+        e=self.emu;c=e.cpu;m=e.mmu;p=e.ppu
+        return(c.r[:],{k:v[:] for k,v in c.r_banked.items()},dict(c.spsr),c.cpsr,c.pipeline[:],c.pipeline_valid,c.halted,c.cycles,m.ewram[:],m.iwram[:],m.io_ram[:],m.palette[:],m.vram[:],m.oam[:],m.sram[:],m.bios_readable,e.scanline,e.instructions,e.keys,[r[:] for r in p.bg_ref],p._bg_ref_raw[:])
+    def restore(self,s):
+        e=self.emu;c=e.cpu;m=e.mmu;p=e.ppu;c.r[:],bk,sp,c.cpsr,c.pipeline[:],c.pipeline_valid,c.halted,c.cycles,m.ewram[:],m.iwram[:],m.io_ram[:],m.palette[:],m.vram[:],m.oam[:],m.sram[:],m.bios_readable,e.scanline,e.instructions,e.keys,ref,p._bg_ref_raw[:]=s
+        for k,v in bk.items():c.r_banked[k][:]=v
+        c.spsr.update(sp);p.bg_ref=[r[:] for r in ref]
     def _capture(self):return zlib.compress(json.dumps({'cpu_r':list(self.emu.cpu.r),'cpu_cpsr':self.emu.cpu.cpsr,'cpu_spsr':{str(k):v for k,v in self.emu.cpu.spsr.items()},'cpu_halted':self.emu.cpu.halted,'ewram':bytes(self.emu.mmu.ewram).hex(),'iwram':bytes(self.emu.mmu.iwram).hex(),'io_ram':bytes(self.emu.mmu.io_ram).hex(),'palette':bytes(self.emu.mmu.palette).hex(),'vram':bytes(self.emu.mmu.vram).hex(),'oam':bytes(self.emu.mmu.oam).hex(),'sram':bytes(self.emu.mmu.sram).hex()}).encode())
     def _restore(self,d):
         s=json.loads(zlib.decompress(d).decode());self.emu.cpu.r=s['cpu_r'];self.emu.cpu.cpsr=s['cpu_cpsr'];self.emu.cpu.spsr={int(k):v for k,v in s['cpu_spsr'].items()};self.emu.cpu.halted=s['cpu_halted'];self.emu.cpu.flush_pipeline()
         self.emu.mmu.ewram=bytearray.fromhex(s['ewram']);self.emu.mmu.iwram=bytearray.fromhex(s['iwram']);self.emu.mmu.io_ram=bytearray.fromhex(s['io_ram']);self.emu.mmu.palette=bytearray.fromhex(s['palette']);self.emu.mmu.vram=bytearray.fromhex(s['vram']);self.emu.mmu.oam=bytearray.fromhex(s['oam']);self.emu.mmu.sram=bytearray.fromhex(s['sram'])
 
+LINE_IO = 0x60
+RP_VRAM, RP_OAM, RP_IO, RP_PAL = 0, VRAM_SIZE, VRAM_SIZE+OAM_SIZE, VRAM_SIZE+OAM_SIZE+LINE_IO*VISIBLE_SCANLINES
+RP_FB = RP_PAL+PALETTE_SIZE*VISIBLE_SCANLINES; RP_SLOT = RP_FB+GBA_WIDTH*GBA_HEIGHT*3
+
+def _render_worker(name,cq,dq):
+    shm=shared_memory.SharedMemory(name=name);b=shm.buf;mmu=MMU();ppu=PPU(mmu)
+    try:
+        while(msg:=cq.get()) is not None:
+            sl,ppu.palette_filter,le=msg;o=sl*RP_SLOT;ppu.layer_enable[:]=le;mmu.vram[:]=b[o+RP_VRAM:o+RP_OAM];mmu.oam[:]=b[o+RP_OAM:o+RP_IO]
+            for y in range(VISIBLE_SCANLINES):io=o+RP_IO+y*LINE_IO;pa=o+RP_PAL+y*PALETTE_SIZE;mmu.io_ram[:LINE_IO]=b[io:io+LINE_IO];mmu.palette[:]=b[pa:pa+PALETTE_SIZE];ppu.render_scanline(y)
+            b[o+RP_FB:o+RP_SLOT]=ppu.framebuffer;dq.put(sl)
+    finally:del b;shm.close()
+
+class RenderProcess:
+    def __init__(self,emu):
+        self.emu=emu;self.shm=shared_memory.SharedMemory(create=True,size=RP_SLOT*2);self.buf=self.shm.buf;self.cq=mp.Queue();self.dq=mp.Queue();self.slot=0;self.pending=set();self.active=False;self.dead=False;self.rmmu=MMU();self.rppu=PPU(self.rmmu);self.replaying=False
+        self.proc=mp.Process(target=_render_worker,args=(self.shm.name,self.cq,self.dq),daemon=True,name="CatEMU-PPU");self.proc.start()
+    def _collect(self,wait=None):
+        while self.pending:
+            try:sl=self.dq.get(timeout=2.0) if wait in self.pending else self.dq.get_nowait()
+            except queue.Empty:
+                if wait not in self.pending:break
+                if self.proc.is_alive():continue
+                self.pending.clear();self.dead=True;break
+            self.pending.discard(sl);o=sl*RP_SLOT;p=self.emu.ppu;p.framebuffer[:]=self.buf[o+RP_FB:o+RP_SLOT];p.swap_buffers()
+    def capture_line(self,y):
+        m=self.emu.mmu;o=self.slot*RP_SLOT
+        if y==0:
+            self._collect(self.slot)
+            if self.dead or not self.proc.is_alive():print("Error:render process died, rendering in-process");self.emu.set_render_process(False);return self.emu.ppu.render_scanline(y)
+            self.active=True;self.replaying=False;m.video_dirty=False;self.buf[o+RP_VRAM:o+RP_OAM]=m.vram;self.buf[o+RP_OAM:o+RP_IO]=m.oam
+        if self.active and m.video_dirty:self._replay(y)
+        if self.replaying:
+            self.rppu.render_scanline(y)
+            if y==VISIBLE_SCANLINES-1:p=self.emu.ppu;p.framebuffer[:]=self.rppu.framebuffer;self.replaying=False;p.swap_buffers()
+            return
+        if not self.active:return
+        io=o+RP_IO+y*LINE_IO;pa=o+RP_PAL+y*PALETTE_SIZE;self.buf[io:io+LINE_IO]=m.io_ram[:LINE_IO];self.buf[pa:pa+PALETTE_SIZE]=m.palette
+        if y==VISIBLE_SCANLINES-1:p=self.emu.ppu;self.pending.add(self.slot);self.cq.put((self.slot,p.palette_filter,list(p.layer_enable)));self.slot^=1;self.active=False
+    def _replay(self,y):
+        p=self.emu.ppu;r=self.rppu;rm=self.rmmu;b=self.buf;o=self.slot*RP_SLOT;r.mmu=rm;r.palette_filter=p.palette_filter;r.layer_enable[:]=p.layer_enable;rm.vram[:]=b[o+RP_VRAM:o+RP_OAM];rm.oam[:]=b[o+RP_OAM:o+RP_IO]
+        for l in range(y):io=o+RP_IO+l*LINE_IO;pa=o+RP_PAL+l*PALETTE_SIZE;rm.io_ram[:LINE_IO]=b[io:io+LINE_IO];rm.palette[:]=b[pa:pa+PALETTE_SIZE];r.render_scanline(l)
+        r.mmu=self.emu.mmu;self.active=False;self.replaying=True
+    def collect(self):self._collect()
+    def flush(self):
+        while self.pending and not self.dead:self._collect(next(iter(self.pending)))
+    def close(self):
+        try:self.cq.put(None);self.proc.join(2.0)
+        finally:
+            self.proc.kill() if self.proc.is_alive() else None;self.buf.release();self.shm.close();self.shm.unlink()
+
+class ParallelRenderer:
+    def __init__(self,emu,workers=None):
+        self.emu=emu;self.workers=workers or min(16,os.cpu_count() or 1);self.pool=ThreadPoolExecutor(self.workers,thread_name_prefix="CatEMU-PPU");self.local=threading.local();self.frame=None;self.futures=[]
+    def _render(self,y,fr,io,pal,ref,raw):
+        p=getattr(self.local,'ppu',None)
+        if p is None:p=self.local.ppu=PPU(MMU())
+        m=p.mmu;m.vram,m.oam,le,pf,lut,p.framebuffer=fr;m.io_ram[:LINE_IO]=io;m.palette[:]=pal;p.layer_enable[:]=le;p.bg_ref=ref;p._bg_ref_raw=raw
+        if p.rgb_lut is not lut:p.rgb_lut=lut;p.palette_filter=p._lut_filter=pf;p._pal_key=None
+        p.render_scanline(y)
+    def capture_line(self,y):
+        m=self.emu.mmu;p=self.emu.ppu
+        if y==0:
+            if p._lut_filter!=p.palette_filter:p._build_lut()
+            self.frame=(bytes(m.vram),bytes(m.oam),list(p.layer_enable),p.palette_filter,p.rgb_lut,p.framebuffer);m.video_dirty=False
+        elif m.video_dirty:self.frame=(bytes(m.vram),bytes(m.oam))+self.frame[2:];m.video_dirty=False
+        ref=[r[:] for r in p.bg_ref];raw=p._bg_ref_raw[:];mode=m.get_io16(IO.DISPCNT)&7
+        for i in range(mode if mode in(1,2) else 0):p._affine_ref(i,y)
+        self.futures.append(self.pool.submit(self._render,y,self.frame,bytes(m.io_ram[:LINE_IO]),bytes(m.palette),ref,raw))
+        if y==VISIBLE_SCANLINES-1:
+            for f in self.futures:f.result()
+            self.futures.clear();p.swap_buffers()
+    def collect(self):pass
+    def flush(self):pass
+    def close(self):
+        for f in self.futures:f.cancel()
+        self.futures.clear();self.pool.shutdown(wait=True)
+
+class VideoRecorder(threading.Thread):
+    MAGIC=b'CATV\x01'
+    def __init__(self,path,fmt='catv',depth=16,keyint=300,level=1):
+        super().__init__(daemon=True,name="CatEMU-rec");self.path=path;self.fmt=fmt;self.q=queue.Queue(maxsize=depth);self.keyint=keyint;self.level=level;self.frames=0;self.dropped=0;self.bytes=0;self.error=None;self.start()
+    def submit(self,seq,v):
+        try:self.q.put_nowait((seq,bytes(v)))
+        except queue.Full:self.dropped+=1
+    def close(self):self.q.put(None);self.join();return{'path':self.path,'frames':self.frames,'dropped':self.dropped,'bytes':self.bytes,'error':self.error}
+    def run(self):
+        n=GBA_WIDTH*GBA_HEIGHT*3;prev=0;hdr=f"P6\n{GBA_WIDTH} {GBA_HEIGHT}\n255\n".encode()
+        try:
+            with open(self.path,'wb') as f:
+                if self.fmt=='catv':self.bytes+=f.write(self.MAGIC+struct.pack('<HH',GBA_WIDTH,GBA_HEIGHT))
+                while(it:=self.q.get())is not None:
+                    sq,d=it
+                    if self.fmt=='ppm':self.bytes+=f.write(hdr+d)
+                    else:
+                        k=self.frames%self.keyint==0;cur=int.from_bytes(d,'little');c=zlib.compress(d if k else(cur^prev).to_bytes(n,'little'),self.level);prev=cur
+                        self.bytes+=f.write(struct.pack('<IBI',sq,k,len(c))+c)
+                    self.frames+=1
+        except OSError as e:
+            self.error=str(e)
+            while self.q.get() is not None:pass
+
+def read_recording(p):
+    with open(p,'rb') as f:
+        if f.read(5)!=VideoRecorder.MAGIC:raise ValueError("not a CatEMU recording")
+        w,h=struct.unpack('<HH',f.read(4));n=w*h*3;prev=0
+        while len(hd:=f.read(9))==9:
+            sq,k,ln=struct.unpack('<IBI',hd);cur=int.from_bytes(zlib.decompress(f.read(ln)),'little')
+            prev=cur if k else cur^prev;yield sq,prev.to_bytes(n,'little')
+
 class GBAEmulator:
     def __init__(self):
         self.mmu=MMU();self.cpu=ARM7TDMI(self.mmu);self.ppu=PPU(self.mmu);self.cheats=CheatEngine(self.mmu);self.save_states=SaveStateManager(self)
-        self.running=False;self.paused=False;self.rom_loaded=False;self.rom_path="";self.rom_title="";self.scanline=0;self.keys=0x3FF;self.speed_multiplier=1.0;self.turbo=False
+        self.running=False;self.paused=False;self.rom_loaded=False;self.rom_path="";self.rom_title="";self.scanline=0;self.keys=0x3FF;self.speed_multiplier=1.0;self.turbo=False;self.render_proc=None
+        self.frame_skip_max=4;self.skip_render=False;self.frames_skipped=0;self._skip_run=0;self.turbo_present_every=8;self.turbo_rewind_interval=10;self.instructions=0;self.recorder=None;self.run_ahead=0;self.speculating=False
+        self.set_parallel_render(FREE_THREADED)
     def load_rom(self,p):
         try:
             d=open(p,'rb').read();self.mmu.load_rom(d);self.rom_path=p;self.rom_loaded=True;self.rom_title=d[0xA0:0xAC].decode('ascii',errors='ignore').strip('\x00') if len(d)>=0xAC else Path(p).stem
@@ -496,51 +740,172 @@ class GBAEmulator:
             try:open(Path(self.rom_path).with_suffix('.sav'),'wb').write(self.mmu.sram)
             except:pass
     def reset(self):self.cpu.reset();self.scanline=0;self.mmu.set_io16(IO.KEYINPUT,0x3FF);self.mmu.set_io16(IO.DISPCNT,0x0080)
+    def set_render_process(self,on):
+        if on and not isinstance(self.render_proc,RenderProcess):self.render_proc.close() if self.render_proc else None;self.render_proc=RenderProcess(self)
+        elif not on and isinstance(self.render_proc,RenderProcess):self.render_proc.close();self.render_proc=None
+    def set_parallel_render(self,on,workers=None):
+        if on and not FREE_THREADED:return False
+        if on and not isinstance(self.render_proc,ParallelRenderer):self.render_proc.close() if self.render_proc else None;self.render_proc=ParallelRenderer(self,workers)
+        elif not on and isinstance(self.render_proc,ParallelRenderer):self.render_proc.close();self.render_proc=None
+        return True
+    def start_recording(self,p,fmt=None):
+        self.stop_recording();self.recorder=VideoRecorder(p,fmt or('ppm' if str(p).lower().endswith('.ppm') else 'catv'));self.ppu.on_swap.append(self.recorder.submit)
+    def stop_recording(self):
+        if self.recorder is None:return None
+        self.ppu.on_swap.remove(self.recorder.submit);r=self.recorder;self.recorder=None;return r.close()
+    def plan_frame_skip(self,late):
+        if self.turbo:self._skip_run=(self._skip_run+1)%max(1,self.turbo_present_every);self.skip_render=self._skip_run!=0;return
+        self.skip_render=bool(late) and self._skip_run<self.frame_skip_max
+        if self.skip_render:self._skip_run+=1;self.frames_skipped+=1
+        else:self._skip_run=0
+    def set_turbo(self,on):self.turbo=bool(on)
     def key_down(self,k):self.keys&=~k;self.mmu.set_io16(IO.KEYINPUT,self.keys)
     def key_up(self,k):self.keys|=k;self.mmu.set_io16(IO.KEYINPUT,self.keys)
     def step_scanline(self):
-        tc=CYCLES_PER_SCANLINE;cr=0
-        while cr<tc:self.cpu.check_irq();cr+=self.cpu.step()
+        tc=CYCLES_PER_SCANLINE;cr=0;c=self.cpu;n=0
+        while cr<tc:c.check_irq();cr+=c.step();n+=not c.halted
+        self.instructions+=n
         self.mmu.set_io16(IO.VCOUNT,self.scanline);ds=self.mmu.get_io16(IO.DISPSTAT)
-        if self.scanline<VISIBLE_SCANLINES:self.ppu.render_scanline(self.scanline);ds|=0x02;self.mmu.set_io16(IO.IF,self.mmu.get_io16(IO.IF)|IRQ.HBLANK) if ds&0x10 else None
-        elif self.scanline==VISIBLE_SCANLINES:ds|=0x01;self.mmu.set_io16(IO.IF,self.mmu.get_io16(IO.IF)|IRQ.VBLANK) if ds&0x08 else None;self.cheats.apply_cheats()
+        if self.scanline<VISIBLE_SCANLINES:(self.render_proc.capture_line(self.scanline) if self.render_proc else self.ppu.render_scanline(self.scanline)) if not self.skip_render else None;ds|=0x02;self.mmu.set_io16(IO.IF,self.mmu.get_io16(IO.IF)|IRQ.HBLANK) if ds&0x10 else None
+        elif self.scanline==VISIBLE_SCANLINES:ds|=0x01;self.ppu.swap_buffers() if not(self.render_proc or self.skip_render) else None;self.mmu.set_io16(IO.IF,self.mmu.get_io16(IO.IF)|IRQ.VBLANK) if ds&0x08 else None;self.cheats.apply_cheats()
         vct=(ds>>8)&0xFF;ds=(ds|0x04) if self.scanline==vct else(ds&~0x04);self.mmu.set_io16(IO.IF,self.mmu.get_io16(IO.IF)|IRQ.VCOUNT) if self.scanline==vct and ds&0x20 else None
         self.mmu.set_io16(IO.DISPSTAT,ds);self.scanline+=1
-        if self.scanline>=SCANLINES_PER_FRAME:self.scanline=0;ds&=~0x01;self.mmu.set_io16(IO.DISPSTAT,ds);self.save_states.update_rewind()
+        if self.scanline>=SCANLINES_PER_FRAME:self.scanline=0;ds&=~0x01;self.mmu.set_io16(IO.DISPSTAT,ds);None if self.speculating else self.save_states.update_rewind(self.turbo_rewind_interval if self.turbo else 1);self.render_proc.collect() if self.render_proc else None
+    def _emulate_frame(self):
+        for _ in range(SCANLINES_PER_FRAME):self.step_scanline()
     def run_frame(self):
         if not self.rom_loaded or self.paused:return
-        for _ in range(SCANLINES_PER_FRAME):self.step_scanline()
-    def get_framebuffer(self):return bytes(self.ppu.framebuffer)
+        if self.run_ahead<=0:return self._emulate_frame()
+        p=self.ppu;m=self.mmu;sr=self.skip_render;self.skip_render=True;self._emulate_frame();s=self.save_states.snapshot();kr=m.on_keyinput_read;m.on_keyinput_read=None;p.hold_swap=self.speculating=True
+        try:
+            for i in range(self.run_ahead):self.skip_render=sr or i<self.run_ahead-1;self._emulate_frame()
+            self.render_proc.flush() if self.render_proc else None
+        finally:
+            self.speculating=p.hold_swap=False;self.save_states.restore(s);self.skip_render=sr;m.on_keyinput_read=kr
+            if p.swap_due:p.swap_buffers()
+    def get_framebuffer(self):return bytes(self.ppu.front)
+    def get_frame(self):return self.ppu.frame_seq,self.ppu.front
+    def copy_frame(self):
+        p=self.ppu
+        while True:
+            s=p.frame_seq;d=bytes(p.front)
+            if p.frame_seq==s:return s,d
+
+class FramePacer:
+    def __init__(self,hz=GBA_REFRESH_HZ,spin_ns=1_500_000,slack_ns=2_000_000,max_lag=4,sleep=time.sleep):self.hz=hz;self.period_ns=round(1e9/hz);self.spin_ns=spin_ns;self.slack_ns=slack_ns;self.max_lag=max_lag;self.sleep=sleep;self.deadline=None;self.missed=0;self.missed_emu=0;self.missed_pace=0;self.resyncs=0;self.worst_late_ns=0
+    def reset(self):self.deadline=None
+    def stats(self):return{'missed':self.missed,'emulation':self.missed_emu,'pacing':self.missed_pace,'resyncs':self.resyncs,'worst_late_ms':self.worst_late_ns/1e6}
+    def wait(self,speed=1.0,turbo=False,work_ns=0):
+        now=time.perf_counter_ns()
+        if turbo:self.deadline=now;return 0
+        p=int(self.period_ns/max(speed,0.01))
+        if self.deadline is None:self.deadline=now
+        self.deadline+=p;late=now-self.deadline
+        if late>0:
+            self.missed+=1;self.worst_late_ns=max(self.worst_late_ns,late)
+            if work_ns>p:self.missed_emu+=1
+            else:self.missed_pace+=1
+            if late>self.max_lag*p:self.deadline=now;self.resyncs+=1
+            return -late
+        rem=self.deadline-now
+        if rem>self.spin_ns:self.sleep((rem-self.spin_ns)/1e9)
+        while time.perf_counter_ns()<self.deadline:pass
+        return rem
+
+class LatencyTracker:
+    STAGES=('queue','emulate','render','present','total')
+    def __init__(self,emu,n=256,timeout=2.0):self.emu=emu;self.samples={k:deque(maxlen=n) for k in self.STAGES};self.timeout_ns=int(timeout*1e9);self.ev=None;self.events=0;emu.ppu.on_swap.append(self.swapped)
+    def key(self,t):
+        if self.ev is None or t-self.ev['key']>self.timeout_ns:self.ev={'key':t};self.events+=1
+    def applied(self):
+        ev=self.ev
+        if ev is not None and 'applied' not in ev:ev['applied']=time.perf_counter_ns();self.emu.mmu.on_keyinput_read=self._read
+    def _read(self):
+        ev=self.ev;self.emu.mmu.on_keyinput_read=None
+        if ev is not None and 'read' not in ev:ev['read']=time.perf_counter_ns();ev['seq']=self.emu.ppu.frame_seq
+    def swapped(self,seq,v):
+        ev=self.ev
+        if ev is not None and 'seq' in ev and 'rendered' not in ev and seq>ev['seq']:ev['rendered']=time.perf_counter_ns();ev['rseq']=seq
+    def presented(self,seq):
+        ev=self.ev
+        if ev is None or 'rendered' not in ev or seq<ev['rseq']:return
+        t=time.perf_counter_ns();sm=self.samples;self.ev=None
+        for k,a,b in(('queue',ev['key'],ev['applied']),('emulate',ev['applied'],ev['read']),('render',ev['read'],ev['rendered']),('present',ev['rendered'],t),('total',ev['key'],t)):sm[k].append((b-a)/1e6)
+    def stats(self):
+        r={}
+        for k,v in self.samples.items():
+            v=sorted(v);n=len(v);r[k]={'n':n,'p50':v[min(n-1,n//2)],'p90':v[min(n-1,int(.9*n))],'p99':v[min(n-1,int(.99*n))],'max':v[-1]} if n else{'n':0}
+        return r
+    def dump(self,p):
+        with open(p,'w') as f:json.dump({'events':self.events,'stats':self.stats(),'samples_ms':{k:list(v) for k,v in self.samples.items()}},f,indent=2)
+
+BUSY=object()
+
+class EmuThread(threading.Thread):
+    def __init__(self,emu,fps=GBA_REFRESH_HZ):super().__init__(daemon=True,name="CatEMU-core");self.emu=emu;self.fps=fps;self.pacer=FramePacer(fps,sleep=lambda t:self.stop_event.wait(t));self.latency=LatencyTracker(emu);self.seen=0;self.inputs=deque();self.stop_event=threading.Event();self.active=False;self.frame_count=0;self.dropped=0;self.speed_achieved=0.0
+    def post(self,f,*a):self.inputs.append((f,a,None))
+    def call(self,f,*a,timeout=5.0):
+        if not self.is_alive():return f(*a)
+        r=[None,threading.Event()];it=(f,a,r);self.inputs.append(it)
+        if r[1].wait(timeout):return r[0]
+        try:self.inputs.remove(it);return BUSY
+        except ValueError:r[1].wait();return r[0]
+    def _drain(self):
+        while self.inputs:
+            f,a,r=self.inputs.popleft()
+            try:v=f(*a)
+            except Exception as e:print(f"Error:{e}");v=None
+            if r is not None:r[0]=v;r[1].set()
+    def latest(self):
+        if self.emu.ppu.frame_seq==self.seen:return None
+        s,d=self.emu.copy_frame();self.dropped+=max(0,s-self.seen-1);self.seen=s;return d
+    def stop(self):self.stop_event.set();self.join(1.0) if self.is_alive() and threading.current_thread() is not self else None
+    def run(self):
+        pc=self.pacer;st=time.perf_counter();sf=0
+        while not self.stop_event.is_set():
+            self._drain();e=self.emu;ct=time.perf_counter()
+            if ct-st>=1.0:self.speed_achieved=(self.frame_count-sf)/((ct-st)*GBA_REFRESH_HZ);st=ct;sf=self.frame_count
+            if not(self.active and e.rom_loaded and not e.paused):self.stop_event.wait(0.01);pc.reset();continue
+            t0=time.perf_counter_ns();e.run_frame();self.frame_count+=1
+            e.plan_frame_skip(pc.wait(e.speed_multiplier,e.turbo,time.perf_counter_ns()-t0)<0)
 
 class CatGBAApp:
     def __init__(self):
-        self.root=tk.Tk();self.root.title("CatEMU 4K GBA - Team Flames / Samsoft");self.root.configure(bg='#1a1a2e')
-        self.emu=GBAEmulator();self.scale=SCALE;self.display_width=GBA_WIDTH*self.scale;self.display_height=GBA_HEIGHT*self.scale
-        self.target_fps=60;self.last_frame_time=time.time();self.fps_counter=0;self.fps_display=0;self.fps_last_update=time.time();self.running=False
+        _load_tk();self.root=tk.Tk();self.root.title("CatEMU 4K GBA - Team Flames / Samsoft");self.root.configure(bg='#1a1a2e')
+        self.emu=GBAEmulator();self.scale=SCALE;self.scaler='python';self.display_width=GBA_WIDTH*self.scale;self.display_height=GBA_HEIGHT*self.scale
+        self.target_fps=GBA_REFRESH_HZ;self.last_frame_time=time.time();self.fps_counter=0;self.fps_display=0;self.fps_last_update=time.time();self.running=False;self.cheats_dirty=False
         self.key_map={'x':Key.A,'z':Key.B,'Return':Key.START,'space':Key.SELECT,'Up':Key.UP,'Down':Key.DOWN,'Left':Key.LEFT,'Right':Key.RIGHT,'a':Key.L,'s':Key.R}
-        self._create_menu();self._create_main_layout();self._create_bindings();self.photo=None;self._create_display_image();self._update_loop()
+        self.core=EmuThread(self.emu,self.target_fps);self._create_menu();self._create_main_layout();self._create_bindings();self.photo=None;self._create_display_image();self.core.start();self._update_loop()
     def _create_menu(self):
         mb=tk.Menu(self.root);self.root.config(menu=mb)
-        fm=tk.Menu(mb,tearoff=0);mb.add_cascade(label="File",menu=fm);fm.add_command(label="Open ROM...",command=self._open_rom);fm.add_command(label="Load BIOS...",command=self._load_bios);fm.add_separator();fm.add_command(label="Save SRAM",command=lambda:self.emu.save_sram());fm.add_separator();fm.add_command(label="Exit",command=self._on_close)
+        fm=tk.Menu(mb,tearoff=0);mb.add_cascade(label="File",menu=fm);fm.add_command(label="Open ROM...",command=self._open_rom);fm.add_command(label="Load BIOS...",command=self._load_bios);fm.add_separator();fm.add_command(label="Save SRAM",command=lambda:self.emu.save_sram());fm.add_separator();fm.add_command(label="Start Recording...",command=self._start_recording);fm.add_command(label="Stop Recording",command=self._stop_recording);fm.add_separator();fm.add_command(label="Exit",command=self._on_close)
         em=tk.Menu(mb,tearoff=0);mb.add_cascade(label="Emulation",menu=em);em.add_command(label="Reset",command=self._reset);em.add_command(label="Pause/Resume",command=self._toggle_pause)
+        em.add_command(label="Dump Input Latency...",command=self._dump_latency);fsm=tk.Menu(em,tearoff=0);em.add_cascade(label="Max Frame Skip",menu=fsm);self.frame_skip_var=tk.IntVar(value=self.emu.frame_skip_max)
+        for n in[0,1,2,3,4,6,9]:fsm.add_radiobutton(label="Off" if n==0 else str(n),value=n,variable=self.frame_skip_var,command=lambda:self.core.post(setattr,self.emu,'frame_skip_max',self.frame_skip_var.get()))
+        ram=tk.Menu(em,tearoff=0);em.add_cascade(label="Run-Ahead",menu=ram);self.run_ahead_var=tk.IntVar(value=self.emu.run_ahead)
+        for n in range(5):ram.add_radiobutton(label="Off" if n==0 else f"{n} frame{'s' if n>1 else ''}",value=n,variable=self.run_ahead_var,command=lambda:self.core.post(setattr,self.emu,'run_ahead',self.run_ahead_var.get()))
         sm=tk.Menu(em,tearoff=0);em.add_cascade(label="Save States",menu=sm)
         for i in range(1,5):sm.add_command(label=f"Save Slot {i}",command=lambda s=i:self._save_state(s));sm.add_command(label=f"Load Slot {i}",command=lambda s=i:self._load_state(s))
         vm=tk.Menu(mb,tearoff=0);mb.add_cascade(label="Video",menu=vm)
         scm=tk.Menu(vm,tearoff=0);vm.add_cascade(label="Scale",menu=scm)
         for s in[1,2,3,4,5]:scm.add_command(label=f"{s}x",command=lambda s=s:self._set_scale(s))
+        scl=tk.Menu(vm,tearoff=0);vm.add_cascade(label="Scaler",menu=scl);self.scaler_var=tk.StringVar(value=self.scaler)
+        for n,l in[('zoom','Tk Zoom'),('python','Pure Python'),('numpy','NumPy')]:scl.add_radiobutton(label=l,value=n,variable=self.scaler_var,command=lambda:setattr(self,'scaler',self.scaler_var.get()),state='normal' if n!='numpy' or np is not None else 'disabled')
         pm=tk.Menu(vm,tearoff=0);vm.add_cascade(label="Palette",menu=pm)
         for n in PPU.PALETTES.keys():pm.add_command(label=n.replace('_',' ').title(),command=lambda n=n:self._set_palette(n))
+        self.render_proc_var=tk.BooleanVar(value=False);vm.add_checkbutton(label="Render in Separate Process",variable=self.render_proc_var,command=lambda:(self.core.call(self.emu.set_render_process,self.render_proc_var.get()),self.parallel_var.set(False)))
+        self.parallel_var=tk.BooleanVar(value=isinstance(self.emu.render_proc,ParallelRenderer));vm.add_checkbutton(label="Parallel Scanlines"+("" if FREE_THREADED else " (free-threaded Python only)"),variable=self.parallel_var,state='normal' if FREE_THREADED else 'disabled',command=lambda:(self.core.call(self.emu.set_parallel_render,self.parallel_var.get()),self.render_proc_var.set(False)))
         lm=tk.Menu(vm,tearoff=0);vm.add_cascade(label="Layers",menu=lm);self.layer_vars=[]
         for i,n in enumerate(['BG0','BG1','BG2','BG3','OBJ']):v=tk.BooleanVar(value=True);self.layer_vars.append(v);lm.add_checkbutton(label=n,variable=v,command=self._make_layer_toggle(i,v))
         hm=tk.Menu(mb,tearoff=0);mb.add_cascade(label="Help",menu=hm);hm.add_command(label="Controls",command=self._show_controls);hm.add_command(label="About",command=self._show_about)
     def _make_layer_toggle(self,i,v):
-        def t():self.emu.ppu.layer_enable[i]=v.get()
+        def t():self.core.post(self.emu.ppu.layer_enable.__setitem__,i,v.get())
         return t
     def _create_main_layout(self):
         self.main_frame=ttk.Frame(self.root);self.main_frame.pack(fill='both',expand=True,padx=5,pady=5)
         self.left_panel=ttk.Frame(self.main_frame);self.left_panel.pack(side='left',fill='both',expand=True)
         self.canvas=tk.Canvas(self.left_panel,width=self.display_width,height=self.display_height,bg='#000000',highlightthickness=2,highlightbackground='#4a4a6a');self.canvas.pack(padx=10,pady=10)
-        self.status_frame=ttk.Frame(self.left_panel);self.status_frame.pack(fill='x',padx=10);self.status_label=ttk.Label(self.status_frame,text="No ROM loaded",font=('Consolas',10));self.status_label.pack(side='left');self.fps_label=ttk.Label(self.status_frame,text="FPS: 0",font=('Consolas',10));self.fps_label.pack(side='right')
+        self.status_frame=ttk.Frame(self.left_panel);self.status_frame.pack(fill='x',padx=10);self.status_label=ttk.Label(self.status_frame,text="No ROM loaded",font=('Consolas',10));self.status_label.pack(side='left');self.fps_label=ttk.Label(self.status_frame,text="FPS: 0",font=('Consolas',10));self.fps_label.pack(side='right');self.latency_label=ttk.Label(self.status_frame,text="",font=('Consolas',10));self.latency_label.pack(side='right',padx=10)
         self.right_panel=ttk.Frame(self.main_frame,width=280);self.right_panel.pack(side='right',fill='y',padx=5);self.right_panel.pack_propagate(False)
         self.notebook=ttk.Notebook(self.right_panel);self.notebook.pack(fill='both',expand=True);self._create_controls_tab();self._create_cheats_tab();self._create_states_tab()
     def _create_controls_tab(self):
@@ -559,50 +924,116 @@ class CatGBAApp:
         for i in range(1,5):r=ttk.Frame(qf);r.pack(fill='x',pady=2);ttk.Label(r,text=f"Slot {i}:",width=8).pack(side='left');ttk.Button(r,text="Save",command=lambda s=i:self._save_state(s),width=8).pack(side='left',padx=2);ttk.Button(r,text="Load",command=lambda s=i:self._load_state(s),width=8).pack(side='left',padx=2)
         ff=ttk.LabelFrame(f,text="File Operations",padding=10);ff.pack(fill='x',pady=5);ttk.Button(ff,text="Export State...",command=self._export_state).pack(fill='x',pady=2);ttk.Button(ff,text="Import State...",command=self._import_state).pack(fill='x',pady=2)
         rf=ttk.LabelFrame(f,text="Rewind",padding=10);rf.pack(fill='x',pady=5);ttk.Label(rf,text="Hold Backspace to rewind").pack();self.rewind_enabled_var=tk.BooleanVar(value=True);ttk.Checkbutton(rf,text="Enable Rewind",variable=self.rewind_enabled_var).pack()
-    def _create_display_image(self):d=bytes([0]*(GBA_WIDTH*GBA_HEIGHT*3));s=self._scale_framebuffer(d);ppm=f"P6\n{self.display_width} {self.display_height}\n255\n".encode()+s;self.photo=tk.PhotoImage(data=ppm,format='ppm');self.canvas.create_image(0,0,anchor='nw',image=self.photo,tags='display')
+    def _create_display_image(self):
+        self.canvas.delete('display');self._ppm_header=f"P6\n{self.display_width} {self.display_height}\n255\n".encode();self._ppm_base=f"P6\n{GBA_WIDTH} {GBA_HEIGHT}\n255\n".encode()
+        self.photo=tk.PhotoImage(width=self.display_width,height=self.display_height);self.base_photo=tk.PhotoImage(width=GBA_WIDTH,height=GBA_HEIGHT);self.canvas.create_image(0,0,anchor='nw',image=self.photo,tags='display')
     def _scale_framebuffer(self,d):
-        if self.scale==1:return d
-        s=bytearray(self.display_width*self.display_height*3)
-        for y in range(GBA_HEIGHT):
-            for x in range(GBA_WIDTH):
-                si=(y*GBA_WIDTH+x)*3;r,g,b=d[si],d[si+1],d[si+2]
-                for sy in range(self.scale):
-                    for sx in range(self.scale):dx=x*self.scale+sx;dy=y*self.scale+sy;di=(dy*self.display_width+dx)*3;s[di]=r;s[di+1]=g;s[di+2]=b
-        return bytes(s)
-    def _update_display(self):d=self.emu.get_framebuffer();s=self._scale_framebuffer(d);ppm=f"P6\n{self.display_width} {self.display_height}\n255\n".encode()+s;self.photo=tk.PhotoImage(data=ppm,format='ppm');self.canvas.itemconfig('display',image=self.photo)
+        s=self.scale
+        if s==1:return bytes(d)
+        if self.scaler=='numpy' and np is not None:return np.frombuffer(d,dtype=np.uint8).reshape(GBA_HEIGHT,GBA_WIDTH,3).repeat(s,axis=0).repeat(s,axis=1).tobytes()
+        w=GBA_WIDTH*3*s;h=bytearray(len(d)*s)
+        for k in range(s):
+            for c in range(3):h[k*3+c::3*s]=d[c::3]
+        return b''.join([h[y*w:(y+1)*w]*s for y in range(GBA_HEIGHT)])
+    def _update_display(self,d=None):
+        d=self.emu.get_framebuffer() if d is None else d
+        if self.scaler=='zoom' and self.scale>1:self.base_photo.put(self._ppm_base+d);self.photo.tk.call(self.photo,'copy',self.base_photo,'-zoom',self.scale,self.scale)
+        else:self.photo.put(self._ppm_header+self._scale_framebuffer(d))
     def _create_bindings(self):self.root.bind('<KeyPress>',self._on_key_press);self.root.bind('<KeyRelease>',self._on_key_release);self.root.protocol("WM_DELETE_WINDOW",self._on_close);self.root.bind('<Control-o>',lambda e:self._open_rom());self.root.bind('<Control-r>',lambda e:self._reset());self.root.bind('<p>',lambda e:self._toggle_pause());[self.root.bind(f'<F{i}>',lambda e,s=i:self._load_state(s)) for i in range(1,5)];[self.root.bind(f'<Shift-F{i}>',lambda e,s=i:self._save_state(s)) for i in range(1,5)]
-    def _on_key_press(self,e):k=e.keysym;self.emu.key_down(self.key_map[k]) if k in self.key_map else None;self.emu.__dict__.__setitem__('turbo',True) if k=='Tab' else None;self.emu.save_states.rewind(5) if k=='BackSpace' and self.rewind_enabled_var.get() else None
-    def _on_key_release(self,e):k=e.keysym;self.emu.key_up(self.key_map[k]) if k in self.key_map else None;self.emu.__dict__.__setitem__('turbo',False) if k=='Tab' else None
-    def _on_close(self):self.running=False;self.emu.save_sram();self.root.destroy()
+    def _on_key_press(self,e):k=e.keysym;self.core.latency.key(time.perf_counter_ns()) if k in self.key_map else None;(self.core.post(self.emu.key_down,self.key_map[k]),self.core.post(self.core.latency.applied)) if k in self.key_map else None;self.core.post(self.emu.set_turbo,True) if k=='Tab' else None;self.core.post(self.emu.save_states.rewind,5) if k=='BackSpace' and self.rewind_enabled_var.get() else None
+    def _on_key_release(self,e):k=e.keysym;self.core.post(self.emu.key_up,self.key_map[k]) if k in self.key_map else None;self.core.post(self.emu.set_turbo,False) if k=='Tab' else None
+    def _dump_latency(self):
+        p=filedialog.asksaveasfilename(title="Save Input Latency",defaultextension=".json",filetypes=[("JSON","*.json")])
+        if p:
+            try:self.core.latency.dump(p);self.status_label.config(text=f"Latency written to {Path(p).name}")
+            except OSError as e:messagebox.showerror("Error",str(e))
+    def _start_recording(self):
+        p=filedialog.asksaveasfilename(title="Record Video",defaultextension=".catv",filetypes=[("CatEMU delta stream","*.catv"),("PPM sequence","*.ppm")])
+        if p:self._busy() if self.core.call(self.emu.start_recording,p) is BUSY else self.status_label.config(text=f"Recording to {Path(p).name}")
+    def _stop_recording(self):
+        st=self.core.call(self.emu.stop_recording)
+        if st is BUSY:self._busy()
+        elif st:self.status_label.config(text=f"Recorded {st['frames']} frames ({st['dropped']} dropped, {st['bytes']//1024} KiB)");messagebox.showerror("Error",f"Recording failed: {st['error']}") if st['error'] else None
+    def _on_close(self):self.running=False;self.core.stop();self.emu.stop_recording();self.emu.save_sram();self.emu.set_render_process(False);self.emu.set_parallel_render(False);self.root.destroy()
     def _update_loop(self):
-        if self.running and self.emu.rom_loaded and not self.emu.paused:
-            ct=time.time();ti=1.0/(self.target_fps*self.emu.speed_multiplier);ti=0 if self.emu.turbo else ti;el=ct-self.last_frame_time
-            if el>=ti or self.emu.turbo:self.emu.run_frame();self._update_display();self.last_frame_time=ct;self.fps_counter+=1
-            if ct-self.fps_last_update>=1.0:self.fps_display=self.fps_counter;self.fps_counter=0;self.fps_last_update=ct;self.fps_label.config(text=f"FPS: {self.fps_display}")
-        self.root.after(1,self._update_loop)
-    def _open_rom(self):
-        p=filedialog.askopenfilename(title="Open GBA ROM",filetypes=[("GBA ROMs","*.gba *.bin"),("All","*.*")])
-        if p and self.emu.load_rom(p):self.running=True;self.game_title_label.config(text=f"Title: {self.emu.rom_title}");self.game_status_label.config(text="Status: Running");self.status_label.config(text=self.emu.rom_title)
+        self.core.active=self.running;d=self.core.latest();ct=time.time()
+        if d is not None:self._update_display(d);self.fps_counter+=1;self.core.latency.presented(self.core.seen)
+        if self.cheats_dirty:self.cheats_dirty=False;self._update_cheat_list()
+        if ct-self.fps_last_update>=1.0:self.fps_display=self.fps_counter;self.fps_counter=0;self.fps_last_update=ct;ps=self.core.pacer;self.fps_label.config(text=f"FPS: {self.fps_display}"+(f" | Speed: {self.core.speed_achieved:.1f}x" if self.emu.turbo or self.emu.speed_multiplier!=1.0 else "")+(f" | Skipped: {self.emu.frames_skipped}" if self.emu.frames_skipped else "")+(f" | Late: {ps.missed_emu} emu / {ps.missed_pace} pacing" if ps.missed else ""));ls=self.core.latency.stats();self.latency_label.config(text="Input lag p50/p99 ms: "+" | ".join(f"{k} {v['p50']:.0f}/{v['p99']:.0f}" for k,v in ls.items()) if ls['total']['n'] else "")
+        self.root.after(4,self._update_loop)
+    def _open_rom(self,p=None):
+        p=p or filedialog.askopenfilename(title="Open GBA ROM",filetypes=[("GBA ROMs","*.gba *.bin"),("All","*.*")])
+        r=self.core.call(self.emu.load_rom,p) if p else None
+        if r is BUSY:self._busy()
+        elif r:self.running=True;self.game_title_label.config(text=f"Title: {self.emu.rom_title}");self.game_status_label.config(text="Status: Running");self.status_label.config(text=self.emu.rom_title)
         elif p:messagebox.showerror("Error","Failed to load ROM")
-    def _load_bios(self):p=filedialog.askopenfilename(title="Open GBA BIOS",filetypes=[("BIOS","*.bin *.bios"),("All","*.*")]);messagebox.showinfo("Success","BIOS loaded") if p and self.emu.load_bios(p) else(messagebox.showerror("Error","Failed to load BIOS") if p else None)
-    def _start(self):self.running=True;self.emu.paused=False;self.game_status_label.config(text="Status: Running") if self.emu.rom_loaded else None
-    def _toggle_pause(self):self.emu.paused=not self.emu.paused;self.game_status_label.config(text="Status: "+("Paused" if self.emu.paused else "Running")) if self.emu.rom_loaded else None
-    def _reset(self):self.emu.reset()
+    def _load_bios(self):
+        p=filedialog.askopenfilename(title="Open GBA BIOS",filetypes=[("BIOS","*.bin *.bios"),("All","*.*")]);r=self.core.call(self.emu.load_bios,p) if p else None
+        self._busy() if r is BUSY else messagebox.showinfo("Success","BIOS loaded") if r else(messagebox.showerror("Error","Failed to load BIOS") if p else None)
+    def _busy(self):self.status_label.config(text="Emulator busy, try again")
+    def _start(self):self.running=True;self.core.post(setattr,self.emu,'paused',False);self.game_status_label.config(text="Status: Running") if self.emu.rom_loaded else None
+    def _toggle_pause(self):p=not self.emu.paused;self.core.post(setattr,self.emu,'paused',p);self.game_status_label.config(text="Status: "+("Paused" if p else "Running")) if self.emu.rom_loaded else None
+    def _reset(self):self.core.post(self.emu.reset)
     def _set_scale(self,s):self.scale=s;self.display_width=GBA_WIDTH*s;self.display_height=GBA_HEIGHT*s;self.canvas.config(width=self.display_width,height=self.display_height);self._create_display_image()
-    def _set_palette(self,n):self.emu.ppu.palette_filter=n
-    def _save_state(self,s):self.status_label.config(text=f"State saved to slot {s}") if self.emu.save_states.save_state(s) else self.status_label.config(text="Failed to save state")
-    def _load_state(self,s):self.status_label.config(text=f"State loaded from slot {s}") if self.emu.save_states.load_state(s) else self.status_label.config(text=f"No state in slot {s}")
-    def _export_state(self):p=filedialog.asksaveasfilename(title="Export Save State",defaultextension=".sst",filetypes=[("Save State","*.sst"),("All","*.*")]);messagebox.showinfo("Success","State exported") if p and self.emu.save_states.save_to_file(1,p) else(messagebox.showerror("Error","Failed to export") if p else None)
-    def _import_state(self):p=filedialog.askopenfilename(title="Import Save State",filetypes=[("Save State","*.sst"),("All","*.*")]);messagebox.showinfo("Success","State imported") if p and self.emu.save_states.load_from_file(p,1) else(messagebox.showerror("Error","Failed to import") if p else None)
-    def _add_cheat(self):n=self.cheat_name_entry.get().strip();c=self.cheat_code_text.get("1.0","end").strip();self.emu.cheats.add_cheat(n,c,self.cheat_type_var.get()) if n and c else None;self._update_cheat_list();self.cheat_name_entry.delete(0,'end');self.cheat_code_text.delete("1.0","end")
-    def _toggle_cheat(self):s=self.cheat_listbox.curselection();self.emu.cheats.toggle_cheat(s[0]) if s else None;self._update_cheat_list()
-    def _remove_cheat(self):s=self.cheat_listbox.curselection();self.emu.cheats.remove_cheat(s[0]) if s else None;self._update_cheat_list()
+    def _set_palette(self,n):self.core.post(setattr,self.emu.ppu,'palette_filter',n)
+    def _save_state(self,s):r=self.core.call(self.emu.save_states.save_state,s);self._busy() if r is BUSY else self.status_label.config(text=f"State saved to slot {s}") if r else self.status_label.config(text="Failed to save state")
+    def _load_state(self,s):r=self.core.call(self.emu.save_states.load_state,s);self._busy() if r is BUSY else self.status_label.config(text=f"State loaded from slot {s}") if r else self.status_label.config(text=f"No state in slot {s}")
+    def _export_state(self):
+        p=filedialog.asksaveasfilename(title="Export Save State",defaultextension=".sst",filetypes=[("Save State","*.sst"),("All","*.*")]);r=self.core.call(self.emu.save_states.save_to_file,1,p) if p else None
+        self._busy() if r is BUSY else messagebox.showinfo("Success","State exported") if r else(messagebox.showerror("Error","Failed to export") if p else None)
+    def _import_state(self):
+        p=filedialog.askopenfilename(title="Import Save State",filetypes=[("Save State","*.sst"),("All","*.*")]);r=self.core.call(self.emu.save_states.load_from_file,p,1) if p else None
+        self._busy() if r is BUSY else messagebox.showinfo("Success","State imported") if r else(messagebox.showerror("Error","Failed to import") if p else None)
+    def _add_cheat(self):n=self.cheat_name_entry.get().strip();c=self.cheat_code_text.get("1.0","end").strip();self._cheat_op(self.emu.cheats.add_cheat,n,c,self.cheat_type_var.get()) if n and c else None;self.cheat_name_entry.delete(0,'end');self.cheat_code_text.delete("1.0","end")
+    def _toggle_cheat(self):s=self.cheat_listbox.curselection();self._cheat_op(self.emu.cheats.toggle_cheat,s[0]) if s else None
+    def _remove_cheat(self):s=self.cheat_listbox.curselection();self._cheat_op(self.emu.cheats.remove_cheat,s[0]) if s else None
+    def _cheat_op(self,f,*a):self.core.post(f,*a);self.core.post(setattr,self,'cheats_dirty',True)
     def _update_cheat_list(self):self.cheat_listbox.delete(0,'end');[self.cheat_listbox.insert('end',f"{'[ON]' if c.enabled else '[OFF]'} {c.name}") for c in self.emu.cheats.cheats]
     def _show_controls(self):messagebox.showinfo("Controls","A:X  B:Z\nStart:Enter  Select:Space\nD-Pad:Arrows\nL:A  R:S\nTurbo:Tab\nRewind:Backspace\n\nSave:Shift+F1-F4\nLoad:F1-F4")
     def _show_about(self):messagebox.showinfo("About","CatEMU 4K GBA\n\nDeveloped by Team Flames / Samsoft\nVersion 1.0\n\nPure Python 3.13+ GBA Emulator")
     def run(self):self.root.mainloop()
 
-def main():
+def check_render(frames=2):
+    def scene(r):
+        e=GBAEmulator();e.set_parallel_render(False);e.mmu.load_rom(b'\xfe\xff\xff\xea');e.rom_loaded=True;e.reset();w=e.mmu.write16;e.render_proc=r(e) if r else None
+        for i in range(1,16):w(0x05000000+i*2,i*0x0842);w(0x05000200+i*2,0x7C00|i)
+        w(0x04000000,0x1140);w(0x04000008,0x1F00);[w(0x06000020+i,0x1111) for i in range(0,32,2)];[w(0x0600F800+i,1) for i in range(0,0x800,2)];[w(0x06010000+i,0x3333) for i in range(0,32,2)];w(0x07000000,70);w(0x07000002,50);w(0x07000004,0)
+        out=[]
+        for _ in range(frames):
+            for y in range(SCANLINES_PER_FRAME):
+                if y==74:w(0x07000002,100);[w(0x06000020+i,0x2222) for i in range(0,32,2)]
+                if y==120:w(0x07000002,50);[w(0x06000020+i,0x1111) for i in range(0,32,2)]
+                e.step_scanline()
+            e.render_proc.flush() if e.render_proc else None;out.append(bytes(e.ppu.front))
+        e.render_proc.close() if e.render_proc else None;return out
+    ref=scene(None);return{'process':scene(RenderProcess)==ref,'threads':scene(lambda e:ParallelRenderer(e,4))==ref}
+
+def run_headless(rom,bios=None,frames=600,seconds=None,until=None,render=True,dump_frame=None,dump_sram=None,record=None,run_ahead=0,render_threads=None):
+    e=GBAEmulator();e.run_ahead=run_ahead
+    if render_threads is not None and not e.set_parallel_render(bool(render_threads),render_threads):print("Notice: --render-threads needs a free-threaded Python build; rendering scanlines serially")
+    if bios and not e.load_bios(bios):print(f"Error: cannot load BIOS {bios}");return None
+    if not e.load_rom(rom):return None
+    e.skip_render=not render;n=0;e.start_recording(record) if record else None;t=time.perf_counter();dl=t+seconds if seconds else None
+    while(frames is None or n<frames)and not(dl and time.perf_counter()>=dl)and not(until and until(e)):e.run_frame();n+=1
+    dt=max(time.perf_counter()-t,1e-9);rec=e.stop_recording()
+    if dump_frame:open(dump_frame,'wb').write(f"P6\n{GBA_WIDTH} {GBA_HEIGHT}\n255\n".encode()+e.ppu.front)
+    if dump_sram:open(dump_sram,'wb').write(e.mmu.sram)
+    return{'rom':e.rom_title,'frames':n,'seconds':dt,'fps':n/dt,'speed':n/dt/GBA_REFRESH_HZ,'instructions':e.instructions,'ips':e.instructions/dt,'frame_seq':e.ppu.frame_seq,'frame_crc':zlib.crc32(e.ppu.front),'recording':rec}
+
+def main(argv=None):
+    import argparse
+    ap=argparse.ArgumentParser(description="CatEMU 4K GBA");ap.add_argument('rom',nargs='?',help="ROM to load");ap.add_argument('--bios',help="BIOS image");ap.add_argument('--headless',action='store_true',help="run without Tk and report throughput")
+    ap.add_argument('--frames',type=int,help="frames to run headless (default 600, unlimited with --seconds)");ap.add_argument('--seconds',type=float,help="stop after this much wall time");ap.add_argument('--no-render',action='store_true',help="skip PPU rendering (CPU throughput only)")
+    ap.add_argument('--dump-frame',metavar='PPM',help="write the final frame as PPM");ap.add_argument('--record',metavar='FILE',help="record every rendered frame (.catv delta stream or .ppm sequence)");ap.add_argument('--dump-sram',metavar='FILE',help="write SRAM after the run");ap.add_argument('--run-ahead',type=int,default=0,metavar='N',help="emulate N frames ahead each frame to hide the game's input lag");ap.add_argument('--render-threads',type=int,metavar='N',help="render scanlines on N threads (free-threaded Python only; 0 = serial)");ap.add_argument('--until-frame-crc',type=lambda v:int(v,16),metavar='CRC',help="stop once the displayed frame has this CRC32 (hex)");ap.add_argument('--check-render',action='store_true',help="check that the process and threaded renderers match serial output, mid-frame VRAM/OAM writes included");a=ap.parse_args(argv)
+    if a.check_render:
+        r=check_render();print(" | ".join(f"{k}: {'ok' if v else 'MISMATCH'}" for k,v in r.items()));return 0 if all(r.values()) else 1
+    if a.headless:
+        if not a.rom:ap.error("--headless needs a ROM")
+        st=run_headless(a.rom,a.bios,a.frames if a.frames is not None else(None if a.seconds else 600),a.seconds,render=not a.no_render,dump_frame=a.dump_frame,dump_sram=a.dump_sram,record=a.record,run_ahead=a.run_ahead,render_threads=a.render_threads,until=(lambda e:zlib.crc32(e.ppu.front)==a.until_frame_crc) if a.until_frame_crc is not None else None)
+        if st is None:return 1
+        print(f"{st['rom'] or Path(a.rom).name}: {st['frames']} frames in {st['seconds']:.2f}s | {st['fps']:.2f} fps ({st['speed']*100:.1f}% of GBA) | {st['instructions']} instr, {st['ips']/1e6:.3f} MIPS | frame CRC {st['frame_crc']:08x}")
+        if st['recording']:r=st['recording'];print(f"Recorded {r['frames']} frames ({r['dropped']} dropped) to {r['path']}"+(f" - error: {r['error']}" if r['error'] else ""))
+        return 0
     print("""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                           CatEMU 4K GBA                                      ║
@@ -616,6 +1047,10 @@ Controls: A:X  B:Z  Start:Enter  Select:Space  D-Pad:Arrows  L:A  R:S
 
 Starting GUI...
     """)
-    CatGBAApp().run()
+    app=CatGBAApp()
+    if a.bios:app.core.call(app.emu.load_bios,a.bios)
+    app.core.post(setattr,app.emu,'run_ahead',a.run_ahead);app.run_ahead_var.set(a.run_ahead)
+    if a.rom:app._open_rom(a.rom)
+    app.run();return 0
 
-if __name__=="__main__":main()
+if __name__=="__main__":raise SystemExit(main())
@@ -5,8 +5,6 @@ Wholesome Pwny Council Certified 🐱🍓💕
 License: Hugware v2.0 - Free to use with snuggles and strawberry milk
 """
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext, colorchooser
 import struct
 import array
 import time
@@ -17,9 +15,26 @@ import json
 import os
 import sys
 import math
+import operator
+import itertools
 from typing import Dict, List, Tuple, Optional, Any, Callable
 import queue
 
+try:
+    import numpy as np  # optional: whole-frame filter math
+except ImportError:
+    np = None
+
+# Tk is only needed by the GUI; it is imported on demand so the core runs headless
+tk = ttk = filedialog = messagebox = scrolledtext = colorchooser = None
+
+def _load_tk():
+    """Import tkinter the first time a GUI is created"""
+    global tk, ttk, filedialog, messagebox, scrolledtext, colorchooser
+    if tk is None:
+        import tkinter as tk
+        from tkinter import ttk, filedialog, messagebox, scrolledtext, colorchooser
+
 # ======================
 # LIBMEOW0.1 CORE SYSTEM
 # ======================
@@ -150,193 +165,713 @@ class LibmeowFilter:
         'crt_glow': 'CRT Glow',
         'tv_mode': 'TV Mode',
         'bilinear': 'Bilinear',
-        'hq2x': 'HQ2X (Simulated)'
+        'hq2x': 'Corner Smooth 2x',
+        'hq3x': 'Corner Smooth 3x',
+        'hq4x': 'Corner Smooth 4x'
     }
     
+    # Corner smooth upscaler (filter keys hq2x/hq3x/hq4x): hqx-style YUV
+    # similarity thresholds on Y, U and V. Only corners are ever blended, so
+    # this is not a port of the real hqx case tables
+    HQ_THRESHOLDS = (0x30, 7, 6)
+    # (edge, vertical, diagonal) neighbour indices for the four block corners,
+    # neighbourhood laid out row-major 0..8 with the centre at 4
+    HQ_CORNERS = ((3, 1, 0), (5, 1, 2), (3, 7, 6), (5, 7, 8))
+    HQ_NEIGHBOURS = (0, 1, 2, 3, 5, 6, 7, 8)
+    
+    _hq_yuv = None     # 32768-entry RGB555 -> packed YUV table, shared by all instances
+    _hq_rules = {}     # scale -> 4096-entry rule table
+    
     def __init__(self):
         self.current_filter = "none"
         self.filter_intensity = 1.0
         self.scanline_opacity = 0.3
+        self.use_numpy = np is not None
+        
+        # Lookup tables so the pure-Python paths never do per-pixel arithmetic
+        self._scanline_key = None
+        self._scanline_lut = b""
+        self._div16 = bytes(v // 16 for v in range(256))
+        self._clamp = [min(255, v) for v in range(256 + 8 * 15 + 1)]
+        self._div6 = [v // 6 for v in range(6 * 255 + 1)]
+        self._tv_tables = (
+            [min(255, int((v // 4) * 1.1)) for v in range(4 * 255 + 1)],
+            [v // 4 for v in range(4 * 255 + 1)],
+            [min(255, int((v // 4) * 1.05)) for v in range(4 * 255 + 1)]
+        )
+        
+        # Corner smooth neighbourhood cache (pure path) and per-row reuse between frames
+        self.hq_cache_limit = 1 << 16
+        self._hq_cache = {}
+        self._hq_cache_scale = None
+        self._hq_rows = {}
+        self._hq_weights = {}
+        self._hq_yuv_np = None
+        self._hq_np_frame = None   # (scale, width, height, source copy, upscaled rows) for row reuse
+        
+        # Ordered pipeline; when empty, current_filter alone is used
+        self.chain = []
+        
+        # Preallocated buffers: (size, final stage?) -> [buffers, last index]
+        self._pool = {}
+        self._final_stage = True
+        
+        # Result of the last frame, reused while input and settings are unchanged
+        self._cache_key = None
+        self._cache_result = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def set_chain(self, names):
+        """Set the filter pipeline, e.g. ['hq2x', 'scanlines', 'crt_glow']"""
+        self.chain = [name for name in names if name in self.FILTERS and name != 'none']
+        self._cache_key = None
+    
+    def get_chain(self):
+        """Stages that will run for the next frame"""
+        if self.chain:
+            return tuple(self.chain)
+        return (self.current_filter,) if self.current_filter != "none" else ()
     
     def apply_filter(self, frame_data, width=240, height=160):
-        """Apply the selected filter to frame buffer"""
-        if self.current_filter == "none":
+        """Run the filter chain over a frame buffer"""
+        chain = self.get_chain()
+        if not chain:
             return frame_data
         
-        # Convert to list for manipulation
-        pixels = list(frame_data)
-        
-        if self.current_filter == "scanlines":
-            return self._apply_scanlines(pixels, width, height)
-        elif self.current_filter == "pixelate":
-            return self._apply_pixelate(pixels, width, height, 2)
-        elif self.current_filter == "crt_glow":
-            return self._apply_crt_glow(pixels, width, height)
-        elif self.current_filter == "tv_mode":
-            return self._apply_tv_mode(pixels, width, height)
-        elif self.current_filter == "bilinear":
-            return self._apply_bilinear(pixels, width, height)
-        elif self.current_filter == "hq2x":
-            return self._apply_hq2x(pixels, width, height)
-        
-        return bytes(pixels)
+        # Paused games and menus repeat the same frame: skip the whole chain
+        key = (zlib.crc32(frame_data), len(frame_data), width, height, chain,
+               self.scanline_opacity, self.use_numpy)
+        if key == self._cache_key:
+            self.cache_hits += 1
+            return self._cache_result
+        self.cache_misses += 1
+        
+        # Stages read their input in place (bytes or memoryview) and write a pooled buffer
+        pixels = frame_data
+        for index, name in enumerate(chain):
+            self._final_stage = index == len(chain) - 1
+            pixels, width, height = self._run_stage(name, pixels, width, height)
+        
+        self._cache_key = key
+        self._cache_result = pixels
+        return pixels
+    
+    def _run_stage(self, name, pixels, width, height):
+        """Apply one filter; returns (output, width, height)"""
+        if name == "scanlines":
+            return self._apply_scanlines(pixels, width, height), width, height
+        elif name == "pixelate":
+            return self._apply_pixelate(pixels, width, height, 2), width, height
+        elif name == "crt_glow":
+            return self._apply_crt_glow(pixels, width, height), width, height
+        elif name == "tv_mode":
+            return self._apply_tv_mode(pixels, width, height), width, height
+        elif name == "bilinear":
+            return self._apply_bilinear(pixels, width, height), width, height
+        elif name in ("hq2x", "hq3x", "hq4x"):
+            scale = int(name[2])
+            return self._apply_hqx(pixels, width, height, scale), width * scale, height * scale
+        
+        return pixels, width, height
+    
+    def _output(self, size, source):
+        """Next preallocated buffer of this size that is not the stage's own input
+        
+        Intermediate stages ping-pong between two scratch buffers; the last stage
+        rotates through three, so a finished frame stays intact while the next
+        two are filtered.
+        """
+        final = self._final_stage
+        pool = self._pool.get((size, final))
+        if pool is None:
+            pool = self._pool[(size, final)] = [[bytearray(size) for _ in range(3 if final else 2)], 0]
+        buffers, index = pool
+        index = (index + 1) % len(buffers)
+        if buffers[index] is source:
+            index = (index + 1) % len(buffers)
+        pool[1] = index
+        return buffers[index]
+    
+    def _copy_output(self, pixels):
+        """Pooled buffer pre-filled with the input, for filters that touch only part of it"""
+        result = self._output(len(pixels), pixels)
+        result[:] = pixels
+        return result
+    
+    def _frame_array(self, data, width, height):
+        """View RGB888 bytes as a (height, width, 3) uint8 array without copying"""
+        return np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
     
     def _apply_scanlines(self, pixels, width, height):
-        """Add CRT scanlines"""
-        result = pixels[:]
-        for y in range(height):
-            if y % 2 == 0:
-                line_start = y * width * 3
-                for x in range(width):
-                    idx = line_start + x * 3
-                    # Darken scanline
-                    result[idx] = int(pixels[idx] * (1.0 - self.scanline_opacity))
-                    result[idx + 1] = int(pixels[idx + 1] * (1.0 - self.scanline_opacity))
-                    result[idx + 2] = int(pixels[idx + 2] * (1.0 - self.scanline_opacity))
-        return bytes(result)
+        """Add CRT scanlines (even rows darkened through a byte table)"""
+        if self._scanline_key != self.scanline_opacity:
+            factor = 1.0 - self.scanline_opacity
+            self._scanline_lut = bytes(int(v * factor) for v in range(256))
+            self._scanline_key = self.scanline_opacity
+        
+        result = self._copy_output(pixels)
+        stride = width * 3
+        for start in range(0, height * stride, stride * 2):
+            result[start:start + stride] = result[start:start + stride].translate(self._scanline_lut)
+        return result
     
     def _apply_pixelate(self, pixels, width, height, scale):
         """Pixelate effect"""
-        result = pixels[:]
+        if width % scale or height % scale:
+            return self._apply_pixelate_partial(pixels, width, height, scale)
+        
+        result = self._output(len(pixels), pixels)
+        count = scale * scale
+        
+        if self.use_numpy:
+            blocks = np.frombuffer(pixels, dtype=np.uint8).reshape(
+                height // scale, scale, width // scale, scale, 3)
+            out = np.frombuffer(result, dtype=np.uint8).reshape(blocks.shape)
+            out[...] = (blocks.sum(axis=(1, 3), dtype=np.uint32) // count)[:, None, :, None, :]
+            return result
+        
+        # Pure Python: one strided slice per (row, column offset, channel) in a block
+        stride = width * 3
+        step = scale * 3
+        div = [v // count for v in range(255 * count + 1)]
         for y in range(0, height, scale):
-            for x in range(0, width, scale):
-                # Average color in block
-                r_sum, g_sum, b_sum = 0, 0, 0
-                count = 0
-                
+            rows = [pixels[(y + dy) * stride:(y + dy + 1) * stride] for dy in range(scale)]
+            for c in range(3):
+                parts = [row[c + 3 * dx::step] for row in rows for dx in range(scale)]
+                avg = bytes(map(div.__getitem__, map(sum, zip(*parts))))
                 for dy in range(scale):
+                    line = (y + dy) * stride
                     for dx in range(scale):
-                        yy, xx = y + dy, x + dx
-                        if yy < height and xx < width:
-                            idx = (yy * width + xx) * 3
-                            r_sum += pixels[idx]
-                            g_sum += pixels[idx + 1]
-                            b_sum += pixels[idx + 2]
-                            count += 1
+                        result[line + c + 3 * dx:line + stride:step] = avg
+        return result
+    
+    def _apply_pixelate_partial(self, pixels, width, height, scale):
+        """Pixelate when the frame is not a multiple of the block size"""
+        result = self._copy_output(pixels)
+        for y in range(0, height, scale):
+            for x in range(0, width, scale):
+                # Average color in block
+                ys = range(y, min(y + scale, height))
+                xs = range(x, min(x + scale, width))
+                count = len(ys) * len(xs)
                 
-                if count > 0:
-                    avg_r = r_sum // count
-                    avg_g = g_sum // count
-                    avg_b = b_sum // count
-                    
-                    # Apply to block
-                    for dy in range(scale):
-                        for dx in range(scale):
-                            yy, xx = y + dy, x + dx
-                            if yy < height and xx < width:
-                                idx = (yy * width + xx) * 3
-                                result[idx] = avg_r
-                                result[idx + 1] = avg_g
-                                result[idx + 2] = avg_b
-        
-        return bytes(result)
+                for c in range(3):
+                    avg = sum(pixels[(yy * width + xx) * 3 + c] for yy in ys for xx in xs) // count
+                    for yy in ys:
+                        for xx in xs:
+                            result[(yy * width + xx) * 3 + c] = avg
+        return result
     
     def _apply_crt_glow(self, pixels, width, height):
-        """Simple CRT glow effect"""
-        result = pixels[:]
-        for y in range(height):
-            for x in range(width):
-                idx = (y * width + x) * 3
-                
-                # Add slight glow by blending with neighbors
-                if x > 0 and x < width - 1 and y > 0 and y < height - 1:
-                    r, g, b = pixels[idx], pixels[idx + 1], pixels[idx + 2]
-                    
-                    # Sample neighbors
-                    for dy in [-1, 0, 1]:
-                        for dx in [-1, 0, 1]:
-                            if dx == 0 and dy == 0:
-                                continue
-                            n_idx = ((y + dy) * width + (x + dx)) * 3
-                            r += pixels[n_idx] // 16
-                            g += pixels[n_idx + 1] // 16
-                            b += pixels[n_idx + 2] // 16
-                    
-                    result[idx] = min(255, r)
-                    result[idx + 1] = min(255, g)
-                    result[idx + 2] = min(255, b)
-        
-        return bytes(result)
+        """Simple CRT glow effect: each inner pixel gains 1/16 of its 8 neighbours"""
+        result = self._copy_output(pixels)
+        
+        if self.use_numpy:
+            src = self._frame_array(pixels, width, height)
+            out = self._frame_array(result, width, height)
+            q = (src >> 4).astype(np.int16)
+            column = q[:-2] + q[1:-1] + q[2:]
+            box = column[:, :-2] + column[:, 1:-1] + column[:, 2:]
+            out[1:-1, 1:-1] = np.minimum(255, src[1:-1, 1:-1] + box - q[1:-1, 1:-1])
+            return result
+        
+        # Pure Python: 3x3 box sum of the quartered frame via shifted slices
+        stride = width * 3
+        quarter = bytes(pixels).translate(self._div16)
+        add, sub = operator.add, operator.sub
+        for y in range(1, height - 1):
+            row = y * stride
+            column = list(map(add, map(add, quarter[row - stride:row], quarter[row:row + stride]),
+                              quarter[row + stride:row + 2 * stride]))
+            box = map(add, map(add, column[:-6], column[3:-3]), column[6:])
+            glow = map(sub, map(add, pixels[row + 3:row + stride - 3], box),
+                       quarter[row + 3:row + stride - 3])
+            result[row + 3:row + stride - 3] = bytes(map(self._clamp.__getitem__, glow))
+        return result
     
     def _apply_tv_mode(self, pixels, width, height):
-        """TV/VHS style effect"""
-        result = pixels[:]
+        """TV/VHS style effect: horizontal [1 2 1] blur plus red/blue bleed"""
+        result = self._copy_output(pixels)
+        
+        if self.use_numpy:
+            src = self._frame_array(pixels, width, height).astype(np.int16)
+            out = self._frame_array(result, width, height)
+            blur = (src[:, :-2] + 2 * src[:, 1:-1] + src[:, 2:]) // 4
+            out[:, 1:-1, 0] = np.minimum(255, (blur[..., 0] * 1.1).astype(np.int16))
+            out[:, 1:-1, 1] = blur[..., 1]
+            out[:, 1:-1, 2] = np.minimum(255, (blur[..., 2] * 1.05).astype(np.int16))
+            return result
+        
+        # Pure Python: blurred sums per row, then one table per channel
+        stride = width * 3
+        add = operator.add
         for y in range(height):
-            # Add horizontal blur
-            for x in range(1, width - 1):
-                idx = (y * width + x) * 3
-                
-                # Simple horizontal blur
-                left_idx = idx - 3
-                right_idx = idx + 3
-                
-                r = (pixels[left_idx] + pixels[idx] * 2 + pixels[right_idx]) // 4
-                g = (pixels[left_idx + 1] + pixels[idx + 1] * 2 + pixels[right_idx + 1]) // 4
-                b = (pixels[left_idx + 2] + pixels[idx + 2] * 2 + pixels[right_idx + 2]) // 4
-                
-                # Add slight color bleed
-                r = min(255, int(r * 1.1))
-                b = min(255, int(b * 1.05))
-                
-                result[idx] = r
-                result[idx + 1] = g
-                result[idx + 2] = b
-        
-        return bytes(result)
+            row = y * stride
+            line = pixels[row:row + stride]
+            center = line[3:-3]
+            sums = list(map(add, map(add, line[:-6], line[6:]), map(add, center, center)))
+            for c, table in enumerate(self._tv_tables):
+                result[row + 3 + c:row + stride - 3:3] = bytes(map(table.__getitem__, sums[c::3]))
+        return result
     
     def _apply_bilinear(self, pixels, width, height):
-        """Bilinear interpolation for smoother scaling"""
-        # This is a simplified version for demonstration
-        result = pixels[:]
+        """Smoothing: inner pixels become (up + down + left + right + 2 * self) / 6"""
+        result = self._copy_output(pixels)
+        
+        if self.use_numpy:
+            src = self._frame_array(pixels, width, height).astype(np.int16)
+            out = self._frame_array(result, width, height)
+            out[1:-1, 1:-1] = (src[:-2, 1:-1] + src[2:, 1:-1] + src[1:-1, :-2] +
+                               src[1:-1, 2:] + 2 * src[1:-1, 1:-1]) // 6
+            return result
+        
+        # Pure Python: five shifted slices summed per row
+        stride = width * 3
+        add = operator.add
         for y in range(1, height - 1):
-            for x in range(1, width - 1):
-                idx = (y * width + x) * 3
-                
-                # Get neighbors
-                top = (y - 1) * width + x
-                bottom = (y + 1) * width + x
-                left = y * width + (x - 1)
-                right = y * width + (x + 1)
+            row = y * stride
+            center = pixels[row + 3:row + stride - 3]
+            total = map(add,
+                        map(add, pixels[row - stride + 3:row - 3], pixels[row + stride + 3:row + 2 * stride - 3]),
+                        map(add, map(add, pixels[row:row + stride - 6], pixels[row + 6:row + stride]),
+                            map(add, center, center)))
+            result[row + 3:row + stride - 3] = bytes(map(self._div6.__getitem__, total))
+        return result
+    
+    @classmethod
+    def _hq_yuv_table(cls):
+        """RGB555 -> (Y << 16 | U << 8 | V), built once"""
+        if cls._hq_yuv is None:
+            table = []
+            for c in range(32768):
+                r = (c & 0x1F) << 3
+                g = ((c >> 5) & 0x1F) << 3
+                b = ((c >> 10) & 0x1F) << 3
+                y = int(0.299 * r + 0.587 * g + 0.114 * b)
+                u = int(-0.169 * r - 0.331 * g + 0.5 * b) + 128
+                v = int(0.5 * r - 0.419 * g - 0.081 * b) + 128
+                table.append((y << 16) | (u << 8) | v)
+            cls._hq_yuv = table
+        return cls._hq_yuv
+    
+    @classmethod
+    def _hq_rule_table(cls, scale):
+        """Rule table for one scale: pattern -> per-subpixel ((neighbour, weight/16), ...)
+        
+        Pattern bits 0-7 say which neighbours differ from the centre, bits 8-11
+        say, per corner, whether its two edge neighbours match each other. A
+        corner is cut (blended towards its edge neighbours) when both edge
+        neighbours differ from the centre but match each other and the diagonal
+        neighbour differs too; the blend grows towards the outer corner.
+        """
+        if scale in cls._hq_rules:
+            return cls._hq_rules[scale]
+        
+        subpixels = []
+        for j in range(scale):
+            for i in range(scale):
+                u = (i + 0.5) / scale - 0.5
+                v = (j + 0.5) / scale - 0.5
+                corner = None
+                if u and v:
+                    corner = (u > 0) + 2 * (v > 0)
+                # Edge weight in sixteenths, even so it splits across two neighbours
+                weight = max(0, min(12, 2 * round((abs(u) + abs(v) - 0.25) * 16)))
+                subpixels.append((corner, weight))
+        
+        rules = []
+        for pattern in range(4096):
+            differs = {k: bool(pattern >> bit & 1) for bit, k in enumerate(cls.HQ_NEIGHBOURS)}
+            block = []
+            for corner, weight in subpixels:
+                if corner is not None and weight:
+                    edge, vert, diag = cls.HQ_CORNERS[corner]
+                    if (differs[edge] and differs[vert] and differs[diag]
+                            and pattern >> (8 + corner) & 1):
+                        block.append(((4, 16 - weight), (edge, weight // 2), (vert, weight // 2)))
+                        continue
+                block.append(((4, 16),))
+            rules.append(tuple(block))
+        
+        cls._hq_rules[scale] = rules
+        return rules
+    
+    def _hq_pattern(self, yuv):
+        """12-bit similarity pattern for a 3x3 neighbourhood of packed YUV values"""
+        ty, tu, tv = self.HQ_THRESHOLDS
+        
+        def differ(a, b):
+            return (abs((a >> 16) - (b >> 16)) > ty or
+                    abs(((a >> 8) & 0xFF) - ((b >> 8) & 0xFF)) > tu or
+                    abs((a & 0xFF) - (b & 0xFF)) > tv)
+        
+        center = yuv[4]
+        pattern = 0
+        for bit, k in enumerate(self.HQ_NEIGHBOURS):
+            if differ(yuv[k], center):
+                pattern |= 1 << bit
+        for corner, (edge, vert, _) in enumerate(self.HQ_CORNERS):
+            if not differ(yuv[edge], yuv[vert]):
+                pattern |= 1 << (8 + corner)
+        return pattern
+    
+    def _hq_block(self, colors, scale):
+        """Output block for one neighbourhood of packed 0xRRGGBB colors, as scale rows of bytes"""
+        table = self._hq_yuv_table()
+        yuv = [table[((c >> 19) & 0x1F) | ((c >> 6) & 0x3E0) | ((c << 7) & 0x7C00)] for c in colors]
+        rules = self._hq_rule_table(scale)[self._hq_pattern(yuv)]
+        
+        block = bytearray()
+        for recipe in rules:
+            if len(recipe) == 1:
+                c = colors[recipe[0][0]]
+            else:
+                # Blend R/B and G in separate lanes; weights sum to 16
+                rb = sum(w * (colors[k] & 0xFF00FF) for k, w in recipe) >> 4
+                g = sum(w * (colors[k] & 0x00FF00) for k, w in recipe) >> 4
+                c = (rb & 0xFF00FF) | (g & 0x00FF00)
+            block += c.to_bytes(3, 'big')
+        
+        row = scale * 3
+        return tuple(bytes(block[k * row:(k + 1) * row]) for k in range(scale))
+    
+    def _apply_hqx(self, pixels, width, height, scale):
+        """Corner smooth 2x/3x/4x upscaler driven by hqx-style YUV similarity patterns"""
+        if self.use_numpy:
+            return self._apply_hqx_numpy(pixels, width, height, scale)
+        
+        if self._hq_cache_scale != (scale, width):
+            self._hq_cache.clear()
+            self._hq_rows.clear()
+            self._hq_cache_scale = (scale, width)
+        
+        # Pack each pixel into one int (0xRRGGBB) via a little-endian uint32 view
+        stride = width * 3
+        padded = bytearray(width * height * 4)
+        padded[0::4] = pixels[2::3]
+        padded[1::4] = pixels[1::3]
+        padded[2::4] = pixels[0::3]
+        packed = array.array('I')
+        packed.frombytes(padded)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        
+        cache = self._hq_cache
+        rows = []
+        for y in range(height):
+            # Rows whose 3-row window did not change since last frame are reused
+            window = bytes(pixels[max(0, y - 1) * stride:min(height, y + 2) * stride])
+            previous = self._hq_rows.get(y)
+            if previous is not None and previous[0] == window:
+                rows.extend(previous[1])
+                continue
+            
+            lines = []
+            for yy in (max(0, y - 1), y, min(height - 1, y + 1)):
+                line = packed[yy * width:(yy + 1) * width].tolist()
+                lines.append([line[0]] + line + [line[-1]])
+            up, mid, down = lines
+            
+            blocks = []
+            for key in zip(up, up[1:], up[2:], mid, mid[1:], mid[2:], down, down[1:], down[2:]):
+                block = cache.get(key)
+                if block is None:
+                    if len(cache) >= self.hq_cache_limit:
+                        cache.clear()
+                    block = cache[key] = self._hq_block(key, scale)
+                blocks.append(block)
+            
+            out = [b"".join([block[k] for block in blocks]) for k in range(scale)]
+            self._hq_rows[y] = (window, out)
+            rows.extend(out)
+        
+        result = self._output(len(pixels) * scale * scale, pixels)
+        result[:] = b"".join(rows)
+        return result
+    
+    def _apply_hqx_numpy(self, pixels, width, height, scale):
+        """Same upscaler with the pattern and blend done as array operations"""
+        weights = self._hq_weights.get(scale)
+        if weights is None:
+            # Rule table expanded to dense per-subpixel weights over the 9 neighbours
+            weights = np.zeros((4096, scale * scale, 9), dtype=np.int32)
+            for pattern, block in enumerate(self._hq_rule_table(scale)):
+                for s, recipe in enumerate(block):
+                    for k, w in recipe:
+                        weights[pattern, s, k] = w
+            # Patterns that cut no corner are a plain nearest-neighbour block
+            plain = (weights[:, :, 4] == 16).all(axis=1)
+            weights = self._hq_weights[scale] = (weights, plain)
+        weights, plain = weights
+        if self._hq_yuv_np is None:
+            self._hq_yuv_np = np.array(self._hq_yuv_table(), dtype=np.int32)
+        
+        src = self._frame_array(pixels, width, height)
+        frame = self._hq_np_frame
+        if frame is None or frame[:3] != (scale, width, height):
+            frame = self._hq_np_frame = (scale, width, height, src.copy(),
+                                         np.zeros((height, scale, width, scale, 3), dtype=np.uint8))
+            dirty = np.ones(height, dtype=bool)
+        else:
+            # Rows whose 3-row window did not change since last frame are reused
+            changed = (src != frame[3]).any(axis=(1, 2))
+            dirty = changed.copy()
+            dirty[1:] |= changed[:-1]
+            dirty[:-1] |= changed[1:]
+            frame[3][...] = src
+        cached = frame[4]
+        
+        rows = np.flatnonzero(dirty)
+        if len(rows):
+            # Packed 0xRRGGBB neighbourhoods (row-major, centre at index 4) of the dirty rows
+            packed = src.astype(np.int32)
+            packed = np.pad((packed[..., 0] << 16) | (packed[..., 1] << 8) | packed[..., 2], 1, mode='edge')
+            nb = np.stack([packed[rows + dy, dx:dx + width] for dy in range(3) for dx in range(3)], axis=2)
+            
+            # Blend each distinct neighbourhood once; flat areas and tiles collapse to a few
+            keys = np.ascontiguousarray(nb.reshape(-1, 9)).view(np.dtype((np.void, 36))).ravel()
+            keys, inverse = np.unique(keys, return_inverse=True)
+            unique = keys.view(np.int32).reshape(-1, 9)
+            rgb = (unique[..., None] >> np.array([16, 8, 0], dtype=np.int32)) & 0xFF
+            nb_yuv = self._hq_yuv_np[(rgb[..., 0] >> 3) | ((rgb[..., 1] >> 3) << 5) | ((rgb[..., 2] >> 3) << 10)]
+            
+            ty, tu, tv = self.HQ_THRESHOLDS
+            
+            def differ(a, b):
+                return ((np.abs((a >> 16) - (b >> 16)) > ty) |
+                        (np.abs(((a >> 8) & 0xFF) - ((b >> 8) & 0xFF)) > tu) |
+                        (np.abs((a & 0xFF) - (b & 0xFF)) > tv))
+            
+            pattern = np.zeros(len(unique), dtype=np.int32)
+            for bit, k in enumerate(self.HQ_NEIGHBOURS):
+                pattern |= differ(nb_yuv[:, k], nb_yuv[:, 4]).astype(np.int32) << bit
+            for corner, (edge, vert, _) in enumerate(self.HQ_CORNERS):
+                pattern |= (~differ(nb_yuv[:, edge], nb_yuv[:, vert])).astype(np.int32) << (8 + corner)
+            
+            # Only neighbourhoods that cut a corner need the weighted blend
+            blocks = np.repeat(rgb[:, 4:5], scale * scale, axis=1)
+            cut = np.flatnonzero(~plain[pattern])
+            if len(cut):
+                blocks[cut] = np.einsum('usk,ukc->usc', weights[pattern[cut]], rgb[cut]) >> 4
+            out = blocks.astype(np.uint8)[inverse.ravel()]
+            cached[rows] = out.reshape(len(rows), width, scale, scale, 3).transpose(0, 2, 1, 3, 4)
+        
+        result = self._output(len(pixels) * scale * scale, pixels)
+        np.frombuffer(result, dtype=np.uint8)[...] = cached.reshape(-1)
+        return result
+
+def _filter_worker(shm_name, tasks, results):
+    """Worker process: filter horizontal bands of the shared input frame 🧶
+    
+    Each task is (seq, chain, opacity, use_numpy, width, height, top, start,
+    stop, bottom, in_offset, out_offset). Rows top..bottom are filtered so the
+    neighbourhood filters see real context; only rows start..stop are written.
+    """
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    filters = LibmeowFilter()
+    band = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            (seq, chain, opacity, use_numpy, width, height,
+             top, start, stop, bottom, in_offset, out_offset) = task
+            try:
+                filters.set_chain(chain)
+                filters.scanline_opacity = opacity
+                filters.use_numpy = use_numpy and np is not None
                 
-                # Average with neighbors
-                r = (pixels[top * 3] + pixels[bottom * 3] + 
-                     pixels[left * 3] + pixels[right * 3] + 
-                     pixels[idx] * 2) // 6
-                g = (pixels[top * 3 + 1] + pixels[bottom * 3 + 1] + 
-                     pixels[left * 3 + 1] + pixels[right * 3 + 1] + 
-                     pixels[idx + 1] * 2) // 6
-                b = (pixels[top * 3 + 2] + pixels[bottom * 3 + 2] + 
-                     pixels[left * 3 + 2] + pixels[right * 3 + 2] + 
-                     pixels[idx + 2] * 2) // 6
+                stride = width * 3
+                band = shm.buf[in_offset + top * stride:in_offset + bottom * stride]
+                out = filters.apply_filter(band, width, bottom - top)
                 
-                result[idx] = r
-                result[idx + 1] = g
-                result[idx + 2] = b
+                scale = LibmeowFilterPool.chain_scale(chain)
+                out_stride = stride * scale * scale
+                skip = (start - top) * out_stride
+                rows = (stop - start) * out_stride
+                shm.buf[out_offset + start * out_stride:out_offset + start * out_stride + rows] = \
+                    memoryview(out)[skip:skip + rows]
+                results.put((seq, None))
+            except Exception as e:
+                results.put((seq, repr(e)))
+    finally:
+        # Filter caches may hold views of the last band; drop them before unmapping
+        filters = band = None
+        shm.close()
+
+class LibmeowFilterPool:
+    """Runs the filter chain in worker processes, one frame behind emulation 🧶
+    
+    Frames go to the workers through shared memory and each worker filters a
+    horizontal band, so heavy chains (glow, corner smooth, bilinear) overlap with
+    emulating the next frame. process() hands in frame N and returns the
+    filtered frame N-1: results stay in order and lag by one frame at most.
+    """
+    
+    MAX_SCALE = 4  # largest total upscale the shared output slots can hold
+    
+    def __init__(self, filters, workers=None, width=240, height=160):
+        import multiprocessing as mp
+        from multiprocessing import shared_memory
+        
+        self.filters = filters  # chain and settings are read from here every frame
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.width = width
+        self.height = height
+        
+        # One input frame and one output frame; finished frames are copied out
+        # into three rotating buffers, so a presented frame stays intact while
+        # the next two are filtered
+        self.in_size = width * height * 3
+        self.out_size = self.in_size * self.MAX_SCALE * self.MAX_SCALE
+        self.shm = shared_memory.SharedMemory(create=True, size=self.in_size + self.out_size)
+        self._frames = {}
+        
+        self.tasks = [mp.Queue() for _ in range(self.workers)]
+        self.results = mp.Queue()
+        self.processes = [mp.Process(target=_filter_worker, args=(self.shm.name, q, self.results),
+                                     daemon=True, name=f"libmeow-filter-{i}")
+                          for i, q in enumerate(self.tasks)]
+        for p in self.processes:
+            p.start()
+        
+        self.seq = 0
+        self.pending = None   # (seq, parts, key, output size), or (None, 0, key, reused frame)
+        self._last_key = None
+        self._last_result = None
+        self.frames = 0
+        self.reused = 0
+        self.errors = 0
+        self.failed = False   # set once a worker dies or errors; the pool is then done for
+        
+        print(f"[libmeow0.1] Filter pool started with {self.workers} workers 🧶")
+    
+    @staticmethod
+    def chain_scale(chain):
+        """Total upscale factor of a filter chain"""
+        scale = 1
+        for name in chain:
+            if name in ("hq2x", "hq3x", "hq4x"):
+                scale *= int(name[2])
+        return scale
+    
+    def bands(self, chain, height):
+        """Split rows into (top, start, stop, bottom) bands, one per worker
+        
+        Every stage reads at most one row of context, so each band is padded by
+        one row per stage. Band edges stay on even rows so scanline parity and
+        2x2 pixelate blocks line up with the whole-frame result.
+        """
+        halo = len(chain) + len(chain) % 2
+        rows = -(-height // self.workers)
+        rows += rows % 2
+        bands = []
+        for start in range(0, height, rows):
+            stop = min(height, start + rows)
+            bands.append((max(0, start - halo), start, stop, min(height, stop + halo)))
+        return bands
+    
+    def supports(self, chain, width, height):
+        """Whether this frame fits the shared buffers"""
+        return (width == self.width and height == self.height and
+                self.chain_scale(chain) <= self.MAX_SCALE)
+    
+    def submit(self, frame_data, width=240, height=160):
+        """Copy a frame into shared memory and start filtering it"""
+        filters = self.filters
+        chain = filters.get_chain()
+        key = (zlib.crc32(frame_data), chain, filters.scanline_opacity, filters.use_numpy)
+        if key == self._last_key:
+            # Unchanged frame: the previous result is still valid
+            self.pending = (None, 0, key, self._last_result)
+            return
+        
+        self.shm.buf[:self.in_size] = frame_data
+        self.seq += 1
+        
+        bands = self.bands(chain, height)
+        for worker, (top, start, stop, bottom) in zip(self.tasks, bands):
+            worker.put((self.seq, chain, filters.scanline_opacity, filters.use_numpy, width, height,
+                        top, start, stop, bottom, 0, self.in_size))
         
-        return bytes(result)
+        scale = self.chain_scale(chain)
+        self.pending = (self.seq, len(bands), key, self.in_size * scale * scale)
     
-    def _apply_hq2x(self, pixels, width, height):
-        """Simplified HQ2X-like filter"""
-        result = pixels[:]
-        # This would normally be complex; simplified version
-        for y in range(height):
-            for x in range(width):
-                idx = (y * width + x) * 3
-                
-                # Simple edge detection and sharpening
-                if x > 0 and x < width - 1 and y > 0 and y < height - 1:
-                    # Check for edges
-                    current = pixels[idx] + pixels[idx + 1] + pixels[idx + 2]
-                    left = pixels[idx - 3] + pixels[idx - 2] + pixels[idx - 1]
-                    right = pixels[idx + 3] + pixels[idx + 4] + pixels[idx + 5]
-                    
-                    if abs(current - left) > 30 or abs(current - right) > 30:
-                        # Edge - sharpen
-                        result[idx] = min(255, pixels[idx] * 6 // 5)
-                        result[idx + 1] = min(255, pixels[idx + 1] * 6 // 5)
-                        result[idx + 2] = min(255, pixels[idx + 2] * 6 // 5)
+    def collect(self, timeout=5.0):
+        """Wait for the pending frame; returns its filtered pixels or None"""
+        if self.pending is None:
+            return None
+        seq, parts, key, size = self.pending
+        self.pending = None
         
-        return bytes(result)
+        if seq is None:
+            self.reused += 1
+            return size
+        
+        failed = False
+        deadline = time.monotonic() + timeout
+        while parts:
+            try:
+                done, error = self.results.get(timeout=0.05)
+            except queue.Empty:
+                # Poll so a dead worker is noticed at once instead of after the timeout
+                if all(p.is_alive() for p in self.processes) and time.monotonic() < deadline:
+                    continue
+                print("[libmeow0.1] Filter worker died or timed out 😿")
+                self.errors += 1
+                self.failed = True
+                return None
+            if done != seq:
+                continue  # late answer for an abandoned frame
+            if error:
+                print(f"[libmeow0.1] Filter worker error: {error} 😿")
+                failed = True
+            parts -= 1
+        
+        if failed:
+            self.errors += 1
+            self.failed = True
+            return None
+        
+        buffers = self._frames.get(size)
+        if buffers is None:
+            buffers = self._frames[size] = [[bytearray(size) for _ in range(3)], 0]
+        buffers[1] = (buffers[1] + 1) % 3
+        result = buffers[0][buffers[1]]
+        result[:] = self.shm.buf[self.in_size:self.in_size + size]
+        
+        self.frames += 1
+        self._last_key = key
+        self._last_result = result
+        return result
+    
+    def process(self, frame_data, width=240, height=160):
+        """Hand in this frame and get back the previous one, filtered"""
+        previous = self.collect()
+        if not self.failed:
+            self.submit(frame_data, width, height)
+        return previous
+    
+    def stats(self):
+        """Frames filtered, unchanged frames reused and failures"""
+        return {'workers': self.workers, 'frames': self.frames,
+                'reused': self.reused, 'errors': self.errors}
+    
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        for q in self.tasks:
+            q.put(None)
+        for p in self.processes:
+            p.join(timeout=1.0)
+            if p.is_alive():
+                p.terminate()
+        self.pending = None
+        self.shm.close()
+        self.shm.unlink()
+        print("[libmeow0.1] Filter pool stopped 🧶")
 
 class LibmeowDebug:
     """Debugger for when things get messy 🐛🔍"""
@@ -562,6 +1097,71 @@ class LibmeowJoy:
         
         return button_state & 0x3FF  # 10 buttons max
 
+class LibmeowLowpass:
+    """One-pole low-pass per channel; its memory carries over between blocks 🎚️"""
+    
+    def __init__(self, channels=2, alpha=0.3):
+        self.channels = channels
+        self.alpha = alpha
+        self.reset()
+    
+    def reset(self):
+        """Forget the filter memory (the next sample seeds it)"""
+        self.state = [None] * self.channels
+    
+    def process(self, block):
+        """Filter an interleaved array('f') block in place"""
+        a, b = self.alpha, 1.0 - self.alpha
+        step = lambda y, x: b * y + a * x
+        for c in range(self.channels):
+            samples = block[c::self.channels]
+            if not samples:
+                continue
+            y = self.state[c]
+            if y is None:
+                values = list(itertools.accumulate(samples[1:], step, initial=samples[0]))
+            else:
+                values = list(itertools.accumulate(samples, step, initial=y))[1:]
+            block[c::self.channels] = array.array('f', values)
+            self.state[c] = values[-1]
+        return block
+
+class LibmeowEcho:
+    """Feed-forward echo through a ring-buffer delay line 🔁"""
+    
+    def __init__(self, delay, channels=2, decay=0.3):
+        self.channels = channels
+        self.decay = decay
+        self.set_delay(delay)
+    
+    def set_delay(self, delay):
+        """Delay in frames (one sample per channel)"""
+        self.delay = max(1, int(delay))
+        self.ring = array.array('f', bytes(4 * self.delay * self.channels))
+        self.pos = 0
+    
+    def reset(self):
+        """Silence the delay line"""
+        self.ring = array.array('f', bytes(4 * len(self.ring)))
+        self.pos = 0
+    
+    def process(self, block):
+        """Add the delayed input to an interleaved array('f') block in place"""
+        ring = self.ring
+        size = len(ring)
+        scale = self.decay.__mul__
+        start = 0
+        while start < len(block):
+            # Longest run that stays inside both the block and the ring
+            run = min(len(block) - start, size - self.pos)
+            pos, end = self.pos, start + run
+            dry = block[start:end]
+            block[start:end] = array.array('f', map(operator.add, dry, map(scale, ring[pos:pos + run])))
+            ring[pos:pos + run] = dry
+            self.pos = (pos + run) % size
+            start = end
+        return block
+
 class LibmeowAudio:
     """Audio system with filters 🎵"""
     
@@ -571,52 +1171,446 @@ class LibmeowAudio:
         self.muted = False
         self.sample_rate = 44100
         self.buffer_size = 2048
+        self.channels = 2  # samples arrive interleaved left/right
         self.audio_filters = {
             'lowpass': True,
             'echo': False,
             'reverb': False
         }
         
+        # Streaming stages: the stream is cut into blocks of block_size frames
+        # and every stage keeps its memory from one block (and call) to the next
+        self.input_rate = self.sample_rate  # rate of the samples given to process_audio
+        self.block_size = 256
+        self.lowpass = LibmeowLowpass(self.channels)
+        self.echo = LibmeowEcho(0.05 * self.input_rate, self.channels)  # 0.05 seconds
+        self._active = set()
+        
         print("[libmeow0.1] Audio system initialized~ 🎧")
     
+    def set_input_rate(self, rate):
+        """Tell the pipeline the rate of the incoming stream"""
+        self.input_rate = rate
+        self.echo.set_delay(0.05 * rate)
+    
     def process_audio(self, samples):
-        """Process audio samples with filters"""
+        """Process the next stretch of the interleaved stream with filters"""
         if not self.enabled or self.muted:
-            return [0] * len(samples)
-        
-        # Apply volume
-        samples = [s * self.volume for s in samples]
-        
-        # Apply filters (simplified)
-        if self.audio_filters['lowpass']:
-            samples = self._apply_lowpass(samples)
-        
-        if self.audio_filters['echo']:
-            samples = self._apply_echo(samples)
-        
-        return samples
+            return array.array('f', bytes(4 * len(samples)))
+        
+        stages = []
+        for name, stage in (('lowpass', self.lowpass), ('echo', self.echo)):
+            if self.audio_filters.get(name):
+                stages.append(stage)
+                self._active.add(name)
+            elif name in self._active:
+                # Re-enabling later starts clean instead of replaying stale memory
+                stage.reset()
+                self._active.discard(name)
+        
+        # Apply volume, then each stage, one block at a time
+        out = array.array('f')
+        gain = float(self.volume).__mul__
+        step = self.block_size * self.channels
+        for start in range(0, len(samples), step):
+            block = array.array('f', map(gain, samples[start:start + step]))
+            for stage in stages:
+                stage.process(block)
+            out.extend(block)
+        
+        return out
+
+class LibmeowResampler:
+    """Cubic (Catmull-Rom) resampler for interleaved streams 🎼
     
-    def _apply_lowpass(self, samples):
-        """Simple low-pass filter"""
-        result = [0] * len(samples)
-        alpha = 0.3
-        
-        result[0] = samples[0]
-        for i in range(1, len(samples)):
-            result[i] = alpha * samples[i] + (1 - alpha) * result[i-1]
-        
-        return result
+    The last three input frames and the fractional read position carry over
+    between calls, so a stream can be fed in any chunk sizes. adjust scales
+    the step for rate control (1.0 = exact input_rate -> output_rate).
+    """
     
-    def _apply_echo(self, samples):
-        """Simple echo effect"""
-        result = samples[:]
-        delay = 2205  # 0.05 seconds at 44100 Hz
-        decay = 0.3
-        
-        for i in range(delay, len(samples)):
-            result[i] += samples[i - delay] * decay
+    def __init__(self, input_rate, output_rate, channels=2):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.channels = channels
+        self.adjust = 1.0
+        self.reset()
+    
+    def reset(self):
+        """Start from silence"""
+        self.history = array.array('f', bytes(4 * 3 * self.channels))
+        self.pos = 1.0
+    
+    def process(self, samples):
+        """Resample one chunk; returns array('f') at output_rate"""
+        ch = self.channels
+        buf = self.history + array.array('f', samples)
+        frames = len(buf) // ch
+        step = self.input_rate / self.output_rate * self.adjust
+        pos = self.pos
+        limit = frames - 2
+        out = array.array('f')
+        append = out.append
+        while pos < limit:
+            i = int(pos)
+            t = pos - i
+            t2 = t * t
+            t3 = t2 * t
+            w0 = -0.5 * t3 + t2 - 0.5 * t
+            w1 = 1.5 * t3 - 2.5 * t2 + 1.0
+            w2 = -1.5 * t3 + 2.0 * t2 + 0.5 * t
+            w3 = 0.5 * t3 - 0.5 * t2
+            base = (i - 1) * ch
+            for c in range(base, base + ch):
+                append(w0 * buf[c] + w1 * buf[c + ch] + w2 * buf[c + 2 * ch] + w3 * buf[c + 3 * ch])
+            pos += step
+        
+        self.pos = pos - (frames - 3)
+        self.history = buf[(frames - 3) * ch:]
+        return out
+
+class LibmeowRingBuffer:
+    """Preallocated interleaved sample FIFO between the core and the audio clock 🌀"""
+    
+    def __init__(self, frames, channels=2):
+        self.channels = channels
+        self.capacity = frames * channels  # in samples
+        self.data = array.array('f', bytes(4 * self.capacity))
+        self.read_pos = 0
+        self.count = 0
+        self.dropped = 0  # frames lost to a full buffer
+        self.lock = threading.Lock()
+    
+    @property
+    def fill(self):
+        """Buffered frames"""
+        return self.count // self.channels
+    
+    def write(self, samples):
+        """Append samples; whatever does not fit is dropped. Returns frames written"""
+        with self.lock:
+            n = min(len(samples), self.capacity - self.count)
+            n -= n % self.channels
+            self.dropped += (len(samples) - n) // self.channels
+            start = (self.read_pos + self.count) % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[start:start + first] = samples[:first]
+            self.data[:n - first] = samples[first:n]
+            self.count += n
+        return n // self.channels
+    
+    def read(self, frames):
+        """Remove up to frames frames; returns them as array('f')"""
+        with self.lock:
+            n = min(frames * self.channels, self.count)
+            start = self.read_pos
+            first = min(n, self.capacity - start)
+            out = self.data[start:start + first] + self.data[:n - first]
+            self.read_pos = (start + n) % self.capacity
+            self.count -= n
+        return out
+    
+    def clear(self):
+        with self.lock:
+            self.read_pos = self.count = 0
+
+class LibmeowAudioSink:
+    """Where the finished audio goes; subclasses override write() 🔈
+    
+    A realtime sink is drained at the output rate by a clock thread, the way
+    a sound card pulls samples; other sinks take everything as it is made.
+    """
+    
+    realtime = False
+    
+    def open(self, rate, channels):
+        self.rate = rate
+        self.channels = channels
+        self.frames = 0
+    
+    def write(self, samples):
+        self.frames += len(samples) // self.channels
+    
+    def close(self):
+        pass
+
+class LibmeowNullSink(LibmeowAudioSink):
+    """Discards audio; realtime=True makes it pace like a device (for testing) 🕳️"""
+    
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+
+class LibmeowFileSink(LibmeowAudioSink):
+    """Writes raw interleaved signed 16-bit little-endian PCM 💾"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+    
+    def open(self, rate, channels):
+        super().open(rate, channels)
+        self.file = open(self.path, 'wb')
+    
+    def write(self, samples):
+        super().write(samples)
+        self.file.write(self.to_pcm16(samples))
+    
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+    
+    @staticmethod
+    def to_pcm16(samples):
+        """Float samples (-1.0..1.0) as little-endian int16 bytes"""
+        pcm = array.array('h', [max(-32768, min(32767, int(s * 32767.0))) for s in samples])
+        if sys.byteorder == 'big':
+            pcm.byteswap()
+        return pcm.tobytes()
+
+class LibmeowWavSink(LibmeowFileSink):
+    """Streams 16-bit PCM to a WAV file from a writer thread 🎙️
+    
+    The core thread only queues sample blocks; conversion, checksums and
+    buffered writes happen on the writer thread. The RIFF header is written
+    with zero sizes and patched on close. With checksums=True, a CRC32 of
+    every block's PCM is kept; fed by a non-realtime output each block is one
+    emulated frame, so the list catches audio regressions without a sound
+    device. path may be None to only compute checksums.
+    """
+    
+    def __init__(self, path, checksums=False):
+        super().__init__(path)
+        self.keep_checksums = checksums
+        self.checksums = []
+        self.checksum = 0   # CRC32 over the whole stream
+        self.data_bytes = 0
+        self.queue = queue.Queue()
+        self.writer = None
+        self.error = None
+    
+    def open(self, rate, channels):
+        LibmeowAudioSink.open(self, rate, channels)
+        if self.path:
+            self.file = open(self.path, 'wb', buffering=1 << 16)
+            self.file.write(self._header(0))
+        self.writer = threading.Thread(target=self._run, daemon=True, name="libmeow-wav")
+        self.writer.start()
+    
+    def _header(self, data_bytes):
+        block_align = self.channels * 2
+        return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_bytes, b'WAVE',
+                           b'fmt ', 16, 1, self.channels, self.rate,
+                           self.rate * block_align, block_align, 16, b'data', data_bytes)
+    
+    def write(self, samples):
+        LibmeowAudioSink.write(self, samples)
+        self.queue.put(samples)
+    
+    def _run(self):
+        """Writer thread: convert, checksum and write until close() sends None"""
+        while True:
+            samples = self.queue.get()
+            if samples is None:
+                break
+            if self.error:
+                continue
+            try:
+                pcm = self.to_pcm16(samples)
+                if self.keep_checksums:
+                    self.checksums.append(zlib.crc32(pcm))
+                self.checksum = zlib.crc32(pcm, self.checksum)
+                if self.file:
+                    self.file.write(pcm)
+                self.data_bytes += len(pcm)
+            except OSError as e:
+                self.error = e
+                print(f"[libmeow0.1] WAV writer stopped: {e} 😿")
+    
+    def close(self):
+        """Flush the queue, patch the header sizes and close the file"""
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+        if self.file:
+            try:
+                self.file.seek(0)
+                self.file.write(self._header(self.data_bytes))
+            finally:
+                self.file.close()
+                self.file = None
+
+class LibmeowAudioOutput:
+    """Resampler -> ring buffer -> sink, with rate control that keeps the ring half full ⏱️
+    
+    The core pushes each frame's samples at the native rate; they are
+    resampled to audio.sample_rate and queued. For realtime sinks the
+    resampling ratio is nudged by at most max_adjust according to how far the
+    fill level is from the target, so emulation and playback drift together
+    instead of crackling or dropping frames.
+    """
+    
+    def __init__(self, audio, sink=None, input_rate=32768):
+        self.audio = audio
+        self.rate = audio.sample_rate
+        self.channels = audio.channels
+        self.ring = LibmeowRingBuffer(audio.buffer_size * 2, self.channels)
+        self.target = audio.buffer_size             # frames kept queued
+        self.period = max(1, audio.buffer_size // 4)  # frames per clock tick
+        self.resampler = LibmeowResampler(input_rate, self.rate, self.channels)
+        self.max_adjust = 0.005
+        self.underruns = 0
+        
+        self.sink = None
+        self._clock = None
+        self._stop = threading.Event()
+        self.set_sink(sink or LibmeowNullSink())
+    
+    def set_sink(self, sink):
+        """Swap the destination; the old sink is closed"""
+        self._stop_clock()
+        if self.sink is not None:
+            self.sink.close()
+        self.ring.clear()
+        self.resampler.reset()
+        self.resampler.adjust = 1.0
+        
+        self.sink = sink
+        sink.open(self.rate, self.channels)
+        if sink.realtime:
+            self._stop.clear()
+            self._clock = threading.Thread(target=self._run_clock, daemon=True, name="libmeow-audio")
+            self._clock.start()
+    
+    def push(self, samples):
+        """Queue one chunk of native-rate samples"""
+        sink = self.sink
+        if sink.realtime:
+            # Fuller than the target: make fewer samples; emptier: make more
+            error = (self.ring.fill - self.target) / self.target
+            self.resampler.adjust = 1.0 + self.max_adjust * max(-1.0, min(1.0, error))
+        
+        self.ring.write(self.resampler.process(samples))
+        if not sink.realtime:
+            sink.write(self.ring.read(self.ring.fill))
+    
+    def _run_clock(self):
+        """Drain one period at a time at the output rate, like a sound card"""
+        # Let the ring fill up to the target before playback starts
+        while not self._stop.is_set() and self.ring.fill < self.target:
+            self._stop.wait(0.005)
+        
+        interval = self.period / self.rate
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            block = self.ring.read(self.period)
+            short = self.period * self.channels - len(block)
+            if short:
+                self.underruns += 1
+                block.frombytes(bytes(4 * short))
+            self.sink.write(block)
+            
+            deadline += interval
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            elif delay < -0.25:
+                deadline = time.perf_counter()
+    
+    def _stop_clock(self):
+        if self._clock is not None:
+            self._stop.set()
+            self._clock.join(1.0)
+            self._clock = None
+    
+    def stats(self):
+        """Buffer fill, current ratio adjustment, underruns and dropped frames"""
+        return {'fill': self.ring.fill, 'target': self.target,
+                'adjust': self.resampler.adjust, 'underruns': self.underruns,
+                'dropped': self.ring.dropped, 'frames_out': self.sink.frames}
+    
+    def close(self):
+        """Stop the clock and close the sink"""
+        self._stop_clock()
+        if self.sink is not None:
+            self.sink.close()
+
+class LibmeowLatency:
+    """Input-to-display latency tracker, so we know where the lag hides ⏱️"""
+    
+    # queue: key press -> applied by the core thread at a frame boundary
+    # emulate: applied -> first frame containing the input finished rendering
+    # present: rendered -> shown on the canvas
+    STAGES = ('queue', 'emulate', 'present', 'total')
+    
+    def __init__(self, max_samples=256, timeout=2.0):
+        self.samples = {stage: collections.deque(maxlen=max_samples) for stage in self.STAGES}
+        self.timeout_ns = int(timeout * 1e9)
+        self.event = None  # one key press is tracked at a time
+        self.events = 0
+    
+    def key_pressed(self):
+        """GUI thread: timestamp a key press (ignored while another is in flight)"""
+        now = time.perf_counter_ns()
+        if self.event is None or now - self.event['key'] > self.timeout_ns:
+            self.event = {'key': now}
+            self.events += 1
+    
+    def applied(self, frame_seq):
+        """Core thread: the input reached the core before frame frame_seq+1"""
+        event = self.event
+        if event is not None and 'applied' not in event:
+            event['applied'] = time.perf_counter_ns()
+            event['seq'] = frame_seq
+    
+    def frame_done(self, frame_seq):
+        """Core thread: a frame finished; the first one after the input counts"""
+        event = self.event
+        if event is not None and 'seq' in event and 'rendered' not in event and frame_seq > event['seq']:
+            event['rendered'] = time.perf_counter_ns()
+            event['rendered_seq'] = frame_seq
+    
+    def presented(self, frame_seq):
+        """GUI thread: frame frame_seq is on screen"""
+        event = self.event
+        if event is None or 'rendered' not in event or frame_seq < event['rendered_seq']:
+            return
         
-        return result
+        now = time.perf_counter_ns()
+        self.event = None
+        for stage, start, end in (('queue', event['key'], event['applied']),
+                                  ('emulate', event['applied'], event['rendered']),
+                                  ('present', event['rendered'], now),
+                                  ('total', event['key'], now)):
+            self.samples[stage].append((end - start) / 1e6)
+    
+    def get_stats(self):
+        """Per-stage percentiles in milliseconds"""
+        stats = {}
+        for stage, values in self.samples.items():
+            values = sorted(values)
+            n = len(values)
+            if not n:
+                stats[stage] = {'n': 0}
+                continue
+            stats[stage] = {
+                'n': n,
+                'p50': values[min(n - 1, n // 2)],
+                'p90': values[min(n - 1, int(0.9 * n))],
+                'p99': values[min(n - 1, int(0.99 * n))],
+                'max': values[-1]
+            }
+        return stats
+    
+    def dump(self, filename):
+        """Write stats and raw samples as JSON"""
+        with open(filename, 'w') as f:
+            json.dump({
+                'events': self.events,
+                'stats': self.get_stats(),
+                'samples_ms': {stage: list(values) for stage, values in self.samples.items()}
+            }, f, indent=2)
+        print(f"[libmeow0.1] Latency report saved to {filename}~ ⏱️")
 
 # ======================
 # EMULATOR CORE CLASSES
@@ -675,6 +1669,8 @@ class MMU:
         self.vram = bytearray(0x18000)  # 96KB VRAM
         self.rom = bytearray()
         self.bios = bytearray(0x4000)   # 16KB BIOS
+        self.io = bytearray(0x400)      # I/O registers
+        self.io_write = None            # (offset, value) hook for registers with side effects
         
         print("[MMU] Memory system initialized")
     
@@ -686,6 +1682,8 @@ class MMU:
             return self.bios[address] if address < len(self.bios) else 0
         elif 0x02000000 <= address < 0x02040000:
             return self.ram[address - 0x02000000]
+        elif 0x04000000 <= address < 0x04000400:
+            return self.io[address - 0x04000000]
         elif 0x06000000 <= address < 0x06018000:
             return self.vram[address - 0x06000000]
         elif 0x08000000 <= address < 0x08000000 + len(self.rom):
@@ -709,21 +1707,490 @@ class MMU:
         
         if 0x02000000 <= address < 0x02040000:
             self.ram[address - 0x02000000] = value
+        elif 0x04000000 <= address < 0x04000400:
+            offset = address - 0x04000000
+            self.io[offset] = value
+            if self.io_write:
+                self.io_write(offset, value)
         elif 0x06000000 <= address < 0x06018000:
             self.vram[address - 0x06000000] = value
     
+    def write_half(self, address, value):
+        """Write 16-bit halfword"""
+        address &= 0xFFFFFFFE
+        self.write_byte(address, value)
+        self.write_byte(address + 1, value >> 8)
+    
+    def write_word(self, address, value):
+        """Write 32-bit word"""
+        address &= 0xFFFFFFFC
+        for i in range(4):
+            self.write_byte(address + i, value >> (8 * i))
+    
     def load_rom(self, rom_data):
         """Load ROM into memory"""
         self.rom = bytearray(rom_data)
         print(f"[MMU] ROM loaded: {len(rom_data)} bytes")
 
+class APUChannel:
+    """State of one PSG channel"""
+    
+    def __init__(self):
+        self.on = False
+        self.volume = 0
+        self.env_up = False
+        self.env_period = 0
+        self.env_timer = 0
+        self.length = 0
+        self.phase = 0.0
+        # channel 1 sweep
+        self.sweep_timer = 0
+        self.shadow = 0
+        # channel 4 noise
+        self.lfsr = 0x7FFF
+
+class APU:
+    """GBA sound: four PSG channels plus the DirectSound A/B FIFOs 🔊
+    
+    Everything advances a scanline at a time: timers, FIFO pops and DMA
+    refills, the 512 Hz frame sequencer and the PSG channels are stepped once
+    per 1232 cycles, and the mixer emits the two or three stereo samples that
+    fall inside that window.
+    """
+    
+    CPU_HZ = 16777216
+    SAMPLE_RATE = 32768                       # native mixer rate (SOUNDBIAS default)
+    CYCLES_PER_SAMPLE = CPU_HZ // SAMPLE_RATE
+    CYCLES_PER_SEQUENCER_STEP = CPU_HZ // 512
+    
+    # I/O register offsets
+    SOUND1CNT_L, SOUND1CNT_H, SOUND1CNT_X = 0x60, 0x62, 0x64
+    SOUND2CNT_L, SOUND2CNT_H = 0x68, 0x6C
+    SOUND3CNT_L, SOUND3CNT_H, SOUND3CNT_X = 0x70, 0x72, 0x74
+    SOUND4CNT_L, SOUND4CNT_H = 0x78, 0x7C
+    SOUNDCNT_L, SOUNDCNT_H, SOUNDCNT_X = 0x80, 0x82, 0x84
+    WAVE_RAM, FIFO_A, FIFO_B = 0x90, 0xA0, 0xA4
+    DMA_BASES = (0xBC, 0xC8)                  # DMA1 and DMA2 serve the FIFOs
+    TM0CNT = 0x100
+    IF = 0x202
+    
+    PRESCALERS = (1, 64, 256, 1024)
+    DUTY_EIGHTHS = (1, 2, 4, 6)
+    WAVE_SHIFTS = (4, 0, 1, 2)                # mute, 100%, 50%, 25%
+    PSG_SHIFTS = (2, 1, 0, 0)                 # SOUNDCNT_H PSG volume 25%, 50%, 100%
+    
+    def __init__(self, mmu):
+        self.mmu = mmu
+        self.io = mmu.io
+        mmu.io_write = self.write_io
+        self.reset()
+        print("[APU] Sound unit ready~ 🔊")
+    
+    def reset(self):
+        """Power-on state"""
+        self.channels = [APUChannel() for _ in range(4)]
+        self.wave_ram = bytearray(32)         # two banks of 32 4-bit samples
+        self.fifos = (collections.deque(maxlen=32), collections.deque(maxlen=32))
+        self.fifo_sample = [0, 0]
+        self.dma_source = [0, 0]
+        self.timer_reload = [0] * 4
+        self.timer_counter = [0] * 4
+        self.timer_control = [0] * 4
+        self.timer_sub = [0] * 4
+        self.sequencer_step = 0
+        self._sequencer_cycles = 0
+        self._sample_cycles = 0
+        self.samples = array.array('f')       # interleaved stereo floats at SAMPLE_RATE
+        self.dma_transfers = 0
+    
+    def _io16(self, offset):
+        return self.io[offset] | (self.io[offset + 1] << 8)
+    
+    def _io32(self, offset):
+        return self._io16(offset) | (self._io16(offset + 2) << 16)
+    
+    def _raise_irq(self, bits):
+        self.io[self.IF] |= bits & 0xFF
+        self.io[self.IF + 1] |= bits >> 8
+    
+    # ----- register writes -----
+    
+    def write_io(self, offset, value):
+        """Side effects of a byte written to an I/O register"""
+        if self.FIFO_A <= offset < self.FIFO_A + 8:
+            self.fifos[(offset - self.FIFO_A) >> 2].append(value - 256 if value & 0x80 else value)
+        elif self.WAVE_RAM <= offset < self.WAVE_RAM + 16:
+            # The CPU sees the bank that is not playing
+            bank = 0 if self.io[self.SOUND3CNT_L] & 0x40 else 16
+            self.wave_ram[bank + offset - self.WAVE_RAM] = value
+        elif offset in (0x65, 0x6D, 0x75, 0x7D) and value & 0x80:
+            self._trigger((0x65, 0x6D, 0x75, 0x7D).index(offset))
+        elif offset == self.SOUNDCNT_H + 1:
+            # FIFO reset bits are write-only
+            if value & 0x08:
+                self.fifos[0].clear()
+            if value & 0x80:
+                self.fifos[1].clear()
+            self.io[offset] = value & 0x77
+        elif offset == self.SOUNDCNT_X:
+            if not value & 0x80:
+                for channel in self.channels:
+                    channel.on = False
+        elif self.TM0CNT <= offset < self.TM0CNT + 16:
+            self._write_timer(offset - self.TM0CNT, value)
+        elif offset in (self.DMA_BASES[0] + 11, self.DMA_BASES[1] + 11):
+            # DMA enable: latch the source address
+            index = self.DMA_BASES.index(offset - 11)
+            if value & 0x80:
+                self.dma_source[index] = self._io32(self.DMA_BASES[index])
+    
+    def _write_timer(self, offset, value):
+        timer, reg = offset >> 2, offset & 3
+        if reg < 2:
+            # Writes set the reload value; reads keep returning the counter
+            shift = 8 * reg
+            self.timer_reload[timer] = (self.timer_reload[timer] & ~(0xFF << shift)) | (value << shift)
+            self._publish_timer(timer)
+        elif reg == 2:
+            if value & 0x80 and not self.timer_control[timer] & 0x80:
+                self.timer_counter[timer] = self.timer_reload[timer]
+                self.timer_sub[timer] = 0
+                self._publish_timer(timer)
+            self.timer_control[timer] = value
+    
+    def _publish_timer(self, timer):
+        count = self.timer_counter[timer]
+        self.io[self.TM0CNT + 4 * timer] = count & 0xFF
+        self.io[self.TM0CNT + 4 * timer + 1] = count >> 8
+    
+    def _trigger(self, index):
+        """Restart a PSG channel from its registers"""
+        channel = self.channels[index]
+        io = self.io
+        channel.on = True
+        channel.phase = 0.0
+        
+        if index == 2:
+            channel.length = 256 - io[self.SOUND3CNT_H]
+            channel.on = bool(io[self.SOUND3CNT_L] & 0x80)
+            return
+        
+        envelope = io[(self.SOUND1CNT_H, self.SOUND2CNT_L, 0, self.SOUND4CNT_L)[index] + 1]
+        length = io[(self.SOUND1CNT_H, self.SOUND2CNT_L, 0, self.SOUND4CNT_L)[index]] & 0x3F
+        channel.volume = envelope >> 4
+        channel.env_up = bool(envelope & 0x08)
+        channel.env_period = channel.env_timer = envelope & 0x07
+        channel.length = 64 - length
+        # A channel with its DAC off (volume 0, decreasing) never starts
+        channel.on = bool(envelope & 0xF8)
+        
+        if index == 0:
+            channel.shadow = self._io16(self.SOUND1CNT_X) & 0x7FF
+            channel.sweep_timer = (io[self.SOUND1CNT_L] >> 4) & 7
+        elif index == 3:
+            channel.lfsr = 0x7FFF
+    
+    # ----- stepping -----
+    
+    def step(self, cycles, mix=True):
+        """Advance timers, FIFOs and channels by a scanline's worth of cycles"""
+        overflows = self._run_timers(cycles)
+        
+        # DirectSound: every overflow of the selected timer plays one FIFO byte
+        control = self._io16(self.SOUNDCNT_H)
+        pops_a = self._pop_fifo(0, overflows[(control >> 10) & 1])
+        pops_b = self._pop_fifo(1, overflows[(control >> 14) & 1])
+        
+        self._sequencer_cycles += cycles
+        while self._sequencer_cycles >= self.CYCLES_PER_SEQUENCER_STEP:
+            self._sequencer_cycles -= self.CYCLES_PER_SEQUENCER_STEP
+            self._clock_sequencer()
+        
+        self._sample_cycles += cycles
+        count = self._sample_cycles // self.CYCLES_PER_SAMPLE
+        self._sample_cycles -= count * self.CYCLES_PER_SAMPLE
+        
+        channels = self.channels
+        if count:
+            if mix and self.io[self.SOUNDCNT_X] & 0x80 and not self._idle(control, pops_a, pops_b):
+                self._mix(count, pops_a, pops_b)
+            else:
+                self.samples.frombytes(bytes(8 * count))
+        
+        # Channel status bits in SOUNDCNT_X
+        status = (channels[0].on | (channels[1].on << 1) |
+                  (channels[2].on << 2) | (channels[3].on << 3))
+        self.io[self.SOUNDCNT_X] = (self.io[self.SOUNDCNT_X] & 0x80) | status
+    
+    def _idle(self, control, pops_a, pops_b):
+        """True when mixing would only produce silence (no PSG channel on, FIFOs at 0)"""
+        channels = self.channels
+        if channels[0].on or channels[1].on or channels[2].on or channels[3].on:
+            return False
+        if control & 0x0300 and (self.fifo_sample[0] or any(pops_a)):
+            return False
+        if control & 0x3000 and (self.fifo_sample[1] or any(pops_b)):
+            return False
+        return True
+    
+    def take_samples(self):
+        """Samples mixed since the last call (interleaved stereo, -1.0..1.0)"""
+        samples = self.samples
+        self.samples = array.array('f')
+        return samples
+    
+    def _run_timers(self, cycles):
+        """Advance the four timers; returns the overflow count of each"""
+        overflows = [0, 0, 0, 0]
+        for timer in range(4):
+            control = self.timer_control[timer]
+            if not control & 0x80:
+                continue
+            if timer and control & 0x04:
+                ticks = overflows[timer - 1]  # count-up: clocked by the previous timer
+            else:
+                scale = self.PRESCALERS[control & 3]
+                total = self.timer_sub[timer] + cycles
+                ticks = total // scale
+                self.timer_sub[timer] = total - ticks * scale
+            if not ticks:
+                continue
+            
+            count = self.timer_counter[timer] + ticks
+            if count >= 0x10000:
+                reload = self.timer_reload[timer]
+                period = 0x10000 - reload
+                overflows[timer] = 1 + (count - 0x10000) // period
+                count = reload + (count - 0x10000) % period
+                if control & 0x40:
+                    self._raise_irq(0x08 << timer)
+            self.timer_counter[timer] = count
+            self._publish_timer(timer)
+        return overflows
+    
+    def _pop_fifo(self, index, count):
+        """Play count bytes from a FIFO, refilling it by DMA when it runs low"""
+        if not count:
+            return ()
+        fifo = self.fifos[index]
+        played = []
+        for _ in range(count):
+            if fifo:
+                self.fifo_sample[index] = fifo.popleft()
+            played.append(self.fifo_sample[index])
+            if len(fifo) <= 16:
+                self._fifo_dma(index)
+        return played
+    
+    def _fifo_dma(self, index):
+        """Sound DMA: move four words into FIFO A or B"""
+        destination = 0x04000000 + self.FIFO_A + 4 * index
+        io = self.io
+        for dma, base in enumerate(self.DMA_BASES):
+            control = self._io16(base + 10)
+            if not control & 0x8000 or (control >> 12) & 3 != 3 or self._io32(base + 4) != destination:
+                continue
+            
+            source = self.dma_source[dma]
+            step = (4, -4, 0, 4)[(control >> 7) & 3]
+            fifo = self.fifos[index]
+            for _ in range(4):
+                word = self.mmu.read_word(source)
+                for shift in (0, 8, 16, 24):
+                    value = (word >> shift) & 0xFF
+                    fifo.append(value - 256 if value & 0x80 else value)
+                source = (source + step) & 0xFFFFFFFF
+            self.dma_source[dma] = source
+            self.dma_transfers += 1
+            
+            if control & 0x4000:
+                self._raise_irq(0x200 << dma)
+            if not control & 0x0200:
+                io[base + 11] &= 0x7F  # no repeat: the channel switches itself off
+            return
+    
+    def _clock_sequencer(self):
+        """512 Hz: length at 256 Hz, sweep at 128 Hz, envelopes at 64 Hz"""
+        step = self.sequencer_step
+        self.sequencer_step = (step + 1) & 7
+        io = self.io
+        
+        if not step & 1:
+            length_enable = (io[self.SOUND1CNT_X + 1], io[self.SOUND2CNT_H + 1],
+                             io[self.SOUND3CNT_X + 1], io[self.SOUND4CNT_H + 1])
+            for channel, enable in zip(self.channels, length_enable):
+                if channel.on and enable & 0x40 and channel.length:
+                    channel.length -= 1
+                    if not channel.length:
+                        channel.on = False
+        
+        if step in (2, 6):
+            self._clock_sweep()
+        
+        if step == 7:
+            for index in (0, 1, 3):
+                channel = self.channels[index]
+                if channel.on and channel.env_period:
+                    channel.env_timer -= 1
+                    if channel.env_timer <= 0:
+                        channel.env_timer = channel.env_period
+                        if channel.env_up and channel.volume < 15:
+                            channel.volume += 1
+                        elif not channel.env_up and channel.volume > 0:
+                            channel.volume -= 1
+    
+    def _clock_sweep(self):
+        channel = self.channels[0]
+        sweep = self.io[self.SOUND1CNT_L]
+        period = (sweep >> 4) & 7
+        if not channel.on or not period:
+            return
+        channel.sweep_timer -= 1
+        if channel.sweep_timer > 0:
+            return
+        channel.sweep_timer = period
+        
+        delta = channel.shadow >> (sweep & 7)
+        freq = channel.shadow - delta if sweep & 0x08 else channel.shadow + delta
+        if freq > 0x7FF:
+            channel.on = False
+        elif sweep & 7:
+            channel.shadow = freq
+            # The new frequency is written back to SOUND1CNT_X
+            self.io[self.SOUND1CNT_X] = freq & 0xFF
+            self.io[self.SOUND1CNT_X + 1] = (self.io[self.SOUND1CNT_X + 1] & 0xF8) | (freq >> 8)
+    
+    # ----- channel output -----
+    
+    def _square(self, index, count):
+        """count samples of a square channel, -15..15"""
+        channel = self.channels[index]
+        freq = self._io16((self.SOUND1CNT_X, self.SOUND2CNT_H)[index]) & 0x7FF
+        duty = self.DUTY_EIGHTHS[self.io[(self.SOUND1CNT_H, self.SOUND2CNT_L)[index]] >> 6]
+        step = 32.0 / (2048 - freq)  # duty eighths per output sample
+        volume = channel.volume
+        phase = channel.phase
+        out = []
+        for _ in range(count):
+            phase = (phase + step) % 8.0
+            out.append(volume if phase < duty else -volume)
+        channel.phase = phase
+        return out
+    
+    def _wave(self, count):
+        """count samples of the wave channel, -15..15"""
+        channel = self.channels[2]
+        io = self.io
+        select = io[self.SOUND3CNT_L]
+        level = io[self.SOUND3CNT_H + 1]
+        shift = self.WAVE_SHIFTS[(level >> 5) & 3]
+        freq = self._io16(self.SOUND3CNT_X) & 0x7FF
+        step = 64.0 / (2048 - freq)  # 4-bit samples per output sample
+        
+        # One bank of 32 samples, or both banks as 64 starting at the selected one
+        size = 64 if select & 0x20 else 32
+        start = 32 if select & 0x40 else 0
+        ram = self.wave_ram
+        position = channel.phase
+        out = []
+        for _ in range(count):
+            position = (position + step) % size
+            index = (start + int(position)) & 63
+            nibble = ram[index >> 1] >> 4 if not index & 1 else ram[index >> 1] & 0x0F
+            value = (nibble * 2 - 15) >> shift if shift < 4 else 0
+            out.append((value * 3) >> 2 if level & 0x80 else value)
+        channel.phase = position
+        return out
+    
+    def _noise(self, count):
+        """count samples of the noise channel, -15..15"""
+        channel = self.channels[3]
+        control = self.io[self.SOUND4CNT_H]
+        ratio = control & 7 or 0.5
+        shift = control >> 4
+        short = control & 0x08
+        step = 16.0 / ratio / (2 << shift) if shift < 14 else 0.0  # LFSR clocks per sample
+        lfsr = channel.lfsr
+        volume = channel.volume
+        clock = channel.phase
+        out = []
+        for _ in range(count):
+            clock += step
+            while clock >= 1.0:
+                clock -= 1.0
+                bit = (lfsr ^ (lfsr >> 1)) & 1
+                lfsr = (lfsr >> 1) | (bit << 14)
+                if short:
+                    lfsr = (lfsr & ~0x40) | (bit << 6)
+            out.append(-volume if lfsr & 1 else volume)
+        channel.lfsr = lfsr
+        channel.phase = clock
+        return out
+    
+    def _mix(self, count, pops_a, pops_b):
+        """Mix count stereo samples per SOUNDCNT_L/H"""
+        io = self.io
+        routing = io[self.SOUNDCNT_L + 1]
+        right_volume = (io[self.SOUNDCNT_L] & 7) + 1
+        left_volume = ((io[self.SOUNDCNT_L] >> 4) & 7) + 1
+        control = self._io16(self.SOUNDCNT_H)
+        psg_shift = self.PSG_SHIFTS[control & 3]
+        
+        right = [0] * count
+        left = [0] * count
+        generators = (lambda n: self._square(0, n), lambda n: self._square(1, n), self._wave, self._noise)
+        for index, channel in enumerate(self.channels):
+            if not channel.on or not routing & (0x11 << index):
+                continue
+            out = generators[index](count)
+            if routing & (0x01 << index):
+                right = list(map(operator.add, right, out))
+            if routing & (0x10 << index):
+                left = list(map(operator.add, left, out))
+        
+        # PSG sum (+-60) times master volume (1-8) lands near the FIFO range
+        right = [v * right_volume >> psg_shift for v in right]
+        left = [v * left_volume >> psg_shift for v in left]
+        
+        for fifo, pops, volume_bit, enable_shift in ((0, pops_a, 0x04, 8), (1, pops_b, 0x08, 12)):
+            enable = control >> enable_shift
+            if not enable & 3:
+                continue
+            gain = 4 if control & volume_bit else 2
+            held = self.fifo_sample[fifo]
+            if pops:
+                # Spread the bytes played this scanline over its output samples
+                values = [pops[(i * len(pops)) // count] * gain for i in range(count)]
+            else:
+                values = [held * gain] * count
+            if enable & 1:
+                right = list(map(operator.add, right, values))
+            if enable & 2:
+                left = list(map(operator.add, left, values))
+        
+        scale = 1.0 / 512.0
+        out = self.samples
+        for l, r in zip(left, right):
+            out.append(max(-512, min(511, l)) * scale)
+            out.append(max(-512, min(511, r)) * scale)
+
 class PPU:
     """Picture Processing Unit"""
     
     def __init__(self):
         self.width = 240
         self.height = 160
-        self.framebuffer = bytearray(self.width * self.height * 3)
+        
+        # Double buffering: the PPU draws into the back buffer while consumers
+        # read the finished front buffer through a read-only memoryview
+        size = self.width * self.height * 3
+        self._buffers = (bytearray(size), bytearray(size))
+        self._views = tuple(memoryview(b).toreadonly() for b in self._buffers)
+        self._back = 0
+        self.framebuffer = self._buffers[0]
+        self.front = self._views[1]
+        self.frame_seq = 0
+        
         self.mode = 3  # Bitmap mode
         self.vblank = False
         self.frame_count = 0
@@ -753,7 +2220,19 @@ class PPU:
                     self.framebuffer[idx + 2] = b
         
         self.frame_count += 1
-        return self.framebuffer
+        self.swap_buffers()
+        return self.front
+    
+    def swap_buffers(self):
+        """Publish the back buffer as the new front buffer (at VBlank)"""
+        self.front = self._views[self._back]
+        self._back ^= 1
+        self.framebuffer = self._buffers[self._back]
+        self.frame_seq += 1
+    
+    def get_frame(self):
+        """Return (frame_seq, read-only view of the last finished frame) without copying"""
+        return self.frame_seq, self.front
     
     def get_fps(self):
         """Calculate FPS"""
@@ -781,28 +2260,40 @@ class CatEMU:
         self.cpu = ARM7TDMI()
         self.mmu = MMU()
         self.ppu = PPU()
+        self.apu = APU(self.mmu)
         
         # libmeow0.1 modules
         self.libmeow = LibmeowLoader()
         self.cheats = LibmeowCheat()
         self.debugger = LibmeowDebug(self)
         self.filters = LibmeowFilter()
+        self.filter_pool = None
+        self.filter_workers = 0  # >0 runs the chain in that many worker processes
         self.state_manager = LibmeowState()
         self.joypad = LibmeowJoy()
         self.audio = LibmeowAudio()
+        self.audio.set_input_rate(APU.SAMPLE_RATE)
+        self.audio_output = None  # resampler + ring buffer + sink, see set_audio_sink
+        self.latency = LibmeowLatency()
         
         # Emulator state
         self.running = False
         self.paused = False
         self.speed = 1.0
-        self.frame_skip = 0
+        self.frame_skip = 0  # max consecutive frames to skip
+        self.auto_frameskip = False
+        self.skip_next_frame = False
+        self.frames_skipped = 0
+        self._skip_run = 0
         self.keys_pressed = {}
         self.rom_path = None
         self.current_frame = None
+        self.audio_samples = []
         
         # Performance tracking
         self.frame_time = 0
         self.last_frame = time.time()
+        self.instructions = 0  # the toy CPU retires one instruction per cycle
         
         print("[CatEMU] Ready to play! 🎮")
     
@@ -818,6 +2309,8 @@ class CatEMU:
             self.mmu.load_rom(rom_data)
             self.cpu.memory = self.mmu
             self.cpu.reset()
+            self.cpu.running = True
+            self.apu.reset()
             
             # Enable cheat system
             self._enable_cheat_system()
@@ -851,29 +2344,66 @@ class CatEMU:
         
         start_time = time.time()
         
-        # Run CPU for one frame (simplified)
+        # Run CPU for one frame (simplified), a scanline at a time so the
+        # APU can batch its work per line
         cycles_target = 280896  # GBA cycles per frame at 16.78MHz
+        line_cycles = 1232
+        mix = self.audio.enabled and not self.audio.muted
         
-        while self.cpu.cycles < cycles_target:
-            self.cpu.execute()
+        hit = False
+        for line_end in range(line_cycles, cycles_target + 1, line_cycles):
+            while self.cpu.cycles < line_end:
+                self.cpu.execute()
+                
+                # Check for breakpoints
+                if (self.cpu.pc, None, 0) in self.debugger.breakpoints:
+                    self.debugger.pause()
+                    self.debugger.log(f"Breakpoint hit at 0x{self.cpu.pc:08X}")
+                    hit = True
+                    break
             
-            # Check for breakpoints
-            if (self.cpu.pc, None, 0) in self.debugger.breakpoints:
-                self.debugger.pause()
-                self.debugger.log(f"Breakpoint hit at 0x{self.cpu.pc:08X}")
+            if hit:
                 break
+            self.apu.step(line_cycles, mix)
         
         # Reset cycle counter for next frame
+        self.instructions += self.cpu.cycles
         self.cpu.cycles = 0
         
-        # Render frame
-        framebuffer = self.ppu.render_frame(self.mmu.vram)
+        # Hand this frame's sound to the audio pipeline
+        self.audio_samples = self.audio.process_audio(self.apu.take_samples())
+        if self.audio_output is not None:
+            self.audio_output.push(self.audio_samples)
         
-        # Apply graphics filter
-        if self.filters.current_filter != "none":
-            framebuffer = self.filters.apply_filter(framebuffer)
+        # Skipped frames keep exact CPU timing but do no video work at all
+        skipped = self.skip_next_frame
+        framebuffer = None
         
-        self.current_frame = framebuffer
+        if not skipped:
+            # Render frame
+            framebuffer = self.ppu.render_frame(self.mmu.vram)
+            
+            # Apply graphics filter
+            chain = self.filters.get_chain()
+            self._sync_filter_pool()
+            if chain and self.filter_pool is not None and self.filter_pool.supports(chain, 240, 160):
+                # Filtered in the background; this hands back the previous frame
+                filtered = self.filter_pool.process(framebuffer)
+                if self.filter_pool.failed:
+                    # Shut the pool down once and filter in-line from now on
+                    print("[CatEMU] Filter pool failed, filtering in-line from now on 😿")
+                    self.filter_workers = 0
+                    self._sync_filter_pool()
+                    filtered = self.filters.apply_filter(framebuffer)
+                framebuffer = filtered
+            else:
+                if self.filter_pool is not None and self.filter_pool.pending is not None:
+                    self.filter_pool.collect()  # drop the frame still in flight
+                if chain:
+                    framebuffer = self.filters.apply_filter(framebuffer)
+            
+            if framebuffer is not None:
+                self.current_frame = framebuffer
         
         # Auto-save state
         if self.state_manager.auto_save:
@@ -885,13 +2415,47 @@ class CatEMU:
         # Calculate frame time
         self.frame_time = time.time() - start_time
         
-        # Frame skipping
-        if self.frame_skip > 0:
-            if random.random() < (self.frame_skip / 10.0):
-                return None
+        # Without auto frameskip, skip a fixed frame_skip out of every frame_skip+1
+        if not self.auto_frameskip:
+            self.plan_frame_skip(True)
         
         return framebuffer
     
+    def set_audio_sink(self, sink):
+        """Send audio to a LibmeowAudioSink (None turns the output off)"""
+        if sink is None:
+            if self.audio_output is not None:
+                self.audio_output.close()
+                self.audio_output = None
+        elif self.audio_output is None:
+            self.audio_output = LibmeowAudioOutput(self.audio, sink, APU.SAMPLE_RATE)
+        else:
+            self.audio_output.set_sink(sink)
+    
+    def _sync_filter_pool(self):
+        """Start or stop the filter workers to match filter_workers (core thread only)"""
+        pool = self.filter_pool
+        if pool is not None and pool.workers == self.filter_workers:
+            return
+        if pool is not None:
+            self.filter_pool = None
+            pool.close()
+        if self.filter_workers > 0:
+            try:
+                self.filter_pool = LibmeowFilterPool(self.filters, self.filter_workers)
+            except (OSError, ImportError) as e:
+                print(f"[CatEMU] Filter pool unavailable, filtering in-line: {e} 😿")
+                self.filter_workers = 0
+    
+    def plan_frame_skip(self, late):
+        """Decide whether the next frame renders; never skip more than frame_skip in a row"""
+        self.skip_next_frame = bool(late) and self._skip_run < self.frame_skip
+        if self.skip_next_frame:
+            self._skip_run += 1
+            self.frames_skipped += 1
+        else:
+            self._skip_run = 0
+    
     def _get_state(self):
         """Get current emulator state for saving"""
         return {
@@ -953,6 +2517,11 @@ class CatEMU:
             return True
         return False
     
+    def reset(self):
+        """Reset the CPU and sound hardware (the ROM stays loaded)"""
+        self.cpu.reset()
+        self.apu.reset()
+    
     def key_down(self, key):
         """Handle key press"""
         self.keys_pressed[key] = True
@@ -961,6 +2530,111 @@ class CatEMU:
         """Handle key release"""
         self.keys_pressed[key] = False
 
+class EmulationThread(threading.Thread):
+    """Runs the core off the Tk thread so dialogs and drags never stall the game 🧵🐱"""
+    
+    def __init__(self, emu, max_queued_frames=2):
+        super().__init__(daemon=True, name="libmeow-core")
+        self.emu = emu
+        self.frame_queue = collections.deque(maxlen=max_queued_frames)
+        self.input_queue = collections.deque()
+        self.call_queue = collections.deque()
+        self.stop_event = threading.Event()
+        self.target_fps = 60.0
+        self.frames_emulated = 0
+        self.frames_dropped = 0
+        self.latest_seq = 0
+    
+    def push_input(self, key, pressed):
+        """Queue a key event; it is applied at the next frame boundary"""
+        self.input_queue.append((key, pressed))
+    
+    def call(self, func, *args, timeout=5.0):
+        """Run func(*args) on the core thread between frames and return its result"""
+        if not self.is_alive():
+            return func(*args)
+        done = threading.Event()
+        result = [None]
+        self.call_queue.append((func, args, result, done))
+        done.wait(timeout)
+        return result[0]
+    
+    def _run_calls(self):
+        """Run queued GUI requests that change core state"""
+        while self.call_queue:
+            func, args, result, done = self.call_queue.popleft()
+            try:
+                result[0] = func(*args)
+            except Exception as e:
+                print(f"[libmeow0.1] Core call failed: {e} 😿")
+            done.set()
+    
+    def _apply_inputs(self):
+        """Apply all queued key events to the core"""
+        while self.input_queue:
+            key, pressed = self.input_queue.popleft()
+            if pressed:
+                self.emu.key_down(key)
+                self.emu.latency.applied(self.emu.ppu.frame_seq)
+            else:
+                self.emu.key_up(key)
+    
+    def get_latest_frame(self):
+        """Return the newest finished frame (older ones are dropped) or None"""
+        frame = None
+        while self.frame_queue:
+            self.latest_seq, frame = self.frame_queue.popleft()
+        return frame
+    
+    def run(self):
+        """Core loop: inputs -> frame -> queue -> pace"""
+        next_frame = time.perf_counter()
+        
+        while not self.stop_event.is_set():
+            self._run_calls()
+            self._apply_inputs()
+            
+            if not self.emu.running or self.emu.paused:
+                self.stop_event.wait(0.01)
+                next_frame = time.perf_counter()
+                continue
+            
+            frame = self.emu.run_frame()
+            self.frames_emulated += 1
+            self.emu.latency.frame_done(self.emu.ppu.frame_seq)
+            
+            if frame is not None:
+                # Bounded queue: a full deque silently drops the stalest frame
+                if len(self.frame_queue) == self.frame_queue.maxlen:
+                    self.frames_dropped += 1
+                # Copy at handoff: the PPU renders into this view again after the next swap
+                self.frame_queue.append((self.emu.ppu.frame_seq, bytes(frame)))
+            
+            # Simple pacing at target_fps * speed
+            next_frame += 1.0 / (self.target_fps * self.emu.speed)
+            delay = next_frame - time.perf_counter()
+            
+            # Running behind? Let the core skip video work on the next frame
+            if self.emu.auto_frameskip:
+                self.emu.plan_frame_skip(delay < 0)
+            
+            if delay > 0:
+                self.stop_event.wait(delay)
+            elif delay < -0.1:
+                next_frame = time.perf_counter()
+        
+        # The pool belongs to the core thread; shut its workers down here
+        if self.emu.filter_pool is not None:
+            self.emu.filter_workers = 0
+            self.emu._sync_filter_pool()
+    
+    def stop(self):
+        """Ask the core loop to finish and wait briefly for it"""
+        self.stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(1.0)
+        print("[libmeow0.1] Emulation thread stopped~ 💤")
+
 # ======================
 # GUI INTERFACE
 # ======================
@@ -969,6 +2643,7 @@ class CatEMUGUI:
     """Main GUI for the emulator"""
     
     def __init__(self):
+        _load_tk()
         self.emu = CatEMU()
         self.root = tk.Tk()
         self.root.title("CatGBAEmuHDRV0 - libmeow0.1 🐱✨")
@@ -991,6 +2666,19 @@ class CatEMUGUI:
         # Bind keys
         self.setup_key_bindings()
         
+        # Display images are created lazily on the first frame
+        self.source_image = None
+        self.display_image = None
+        self._ppm_header = b""
+        self._shown_frame = None
+        self._display_key = None
+        self.frames_presented = 0
+        self.frames_unchanged = 0
+        
+        # Start the core thread; the Tk loop only presents frames
+        self.emulation_thread = EmulationThread(self.emu)
+        self.emulation_thread.start()
+        
         # Start update loop
         self.update_interval = 16  # ~60 FPS
         self.root.after(self.update_interval, self.update)
@@ -1014,7 +2702,7 @@ class CatEMUGUI:
         emu_menu = tk.Menu(menubar, tearoff=0)
         emu_menu.add_command(label="Play/Pause ⏯️", command=self.toggle_play_pause, accelerator="Space")
         emu_menu.add_command(label="Reset 🔄", command=self.reset_emu)
-        emu_menu.add_command(label="Rewind ⏪", command=lambda: self.emu.rewind(10))
+        emu_menu.add_command(label="Rewind ⏪", command=lambda: self.rewind(10))
         emu_menu.add_separator()
         
         # Speed submenu
@@ -1038,9 +2726,14 @@ class CatEMUGUI:
             gfx_menu.add_radiobutton(label=display_name, variable=self.current_filter,
                                     value=filter_name, command=self.change_filter)
         
+        gfx_menu.add_command(label="Filter Chain... 🌈", command=self.open_filter_chain)
         gfx_menu.add_separator()
-        gfx_menu.add_checkbutton(label="Auto Frameskip", 
+        self.auto_frameskip_var = tk.BooleanVar(value=False)
+        gfx_menu.add_checkbutton(label="Auto Frameskip", variable=self.auto_frameskip_var,
                                 command=lambda: self.toggle_frameskip())
+        self.filter_workers_var = tk.BooleanVar(value=False)
+        gfx_menu.add_checkbutton(label="Filter Workers 🧶", variable=self.filter_workers_var,
+                                command=lambda: self.toggle_filter_workers())
         menubar.add_cascade(label="Graphics", menu=gfx_menu)
         
         # Tools menu
@@ -1048,6 +2741,7 @@ class CatEMUGUI:
         tools_menu.add_command(label="Debug Panel 🐛", command=self.open_debug_panel)
         tools_menu.add_command(label="Input Config 🎮", command=self.open_input_config)
         tools_menu.add_command(label="Audio Settings 🎧", command=self.open_audio_settings)
+        tools_menu.add_command(label="Save Latency Report ⏱️", command=self.save_latency_report)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         
         # Help menu
@@ -1083,7 +2777,7 @@ class CatEMUGUI:
         # Control buttons
         ttk.Button(side_frame, text="Play ⏯️", command=self.toggle_play_pause).pack(fill=tk.X, pady=2)
         ttk.Button(side_frame, text="Reset 🔄", command=self.reset_emu).pack(fill=tk.X, pady=2)
-        ttk.Button(side_frame, text="Rewind ⏪", command=lambda: self.emu.rewind(10)).pack(fill=tk.X, pady=2)
+        ttk.Button(side_frame, text="Rewind ⏪", command=lambda: self.rewind(10)).pack(fill=tk.X, pady=2)
         
         # State slots
         ttk.Label(side_frame, text="State Slots:").pack(pady=(10, 2))
@@ -1094,9 +2788,9 @@ class CatEMUGUI:
             btn_frame = ttk.Frame(state_frame)
             btn_frame.pack(pady=1)
             ttk.Button(btn_frame, text=f"Save {i}", width=6,
-                      command=lambda s=i: self.emu.save_state(s)).pack(side=tk.LEFT)
+                      command=lambda s=i: self.save_state(s)).pack(side=tk.LEFT)
             ttk.Button(btn_frame, text=f"Load {i}", width=6,
-                      command=lambda s=i: self.emu.load_state(s)).pack(side=tk.LEFT)
+                      command=lambda s=i: self.load_state(s)).pack(side=tk.LEFT)
         
         # Speed control
         ttk.Label(side_frame, text="Speed:").pack(pady=(10, 2))
@@ -1120,6 +2814,9 @@ class CatEMUGUI:
         
         self.rom_label = ttk.Label(status_frame, text="No ROM loaded")
         self.rom_label.pack(side=tk.RIGHT, padx=5)
+        
+        self.latency_label = ttk.Label(status_frame, text="")
+        self.latency_label.pack(side=tk.RIGHT, padx=5)
     
     def setup_key_bindings(self):
         """Setup keyboard bindings"""
@@ -1141,19 +2838,20 @@ class CatEMUGUI:
         
         # Function keys for states
         for i in range(5):
-            self.root.bind(f"<F{i+1}>", lambda e, s=i: self.emu.save_state(s))
-            self.root.bind(f"<Shift-F{i+1}>", lambda e, s=i: self.emu.load_state(s))
+            self.root.bind(f"<F{i+1}>", lambda e, s=i: self.save_state(s))
+            self.root.bind(f"<Shift-F{i+1}>", lambda e, s=i: self.load_state(s))
     
     def key_event(self, key, pressed):
         """Handle keyboard events"""
         if pressed:
-            self.emu.key_down(key)
-        else:
-            self.emu.key_up(key)
+            self.emu.latency.key_pressed()
+        
+        # Forwarded to the core thread, applied at the next frame boundary
+        self.emulation_thread.push_input(key, pressed)
     
-    def open_rom(self):
-        """Open ROM file dialog"""
-        filename = filedialog.askopenfilename(
+    def open_rom(self, filename=None):
+        """Open ROM file dialog (or load the given path directly)"""
+        filename = filename or filedialog.askopenfilename(
             title="Select ROM file",
             filetypes=[
                 ("GBA ROMs", "*.gba *.agb"),
@@ -1166,7 +2864,7 @@ class CatEMUGUI:
             self.status_label.config(text=f"Loading {os.path.basename(filename)}...")
             self.root.update()
             
-            if self.emu.load_rom(filename):
+            if self.emulation_thread.call(self.emu.load_rom, filename):
                 self.rom_loaded = True
                 self.loading_label.destroy()
                 self.rom_label.config(text=os.path.basename(filename))
@@ -1190,25 +2888,71 @@ class CatEMUGUI:
     def reset_emu(self):
         """Reset emulator"""
         if self.rom_loaded:
-            self.emu.cpu.reset()
+            self.emulation_thread.call(self.emu.reset)
             self.status_label.config(text="Emulator reset 🔄")
     
+    def save_state(self, slot):
+        """Save a state on the core thread, between frames"""
+        return self.emulation_thread.call(self.emu.save_state, slot)
+    
+    def load_state(self, slot):
+        """Load a state on the core thread, between frames"""
+        return self.emulation_thread.call(self.emu.load_state, slot)
+    
+    def rewind(self, frames):
+        """Rewind on the core thread, between frames"""
+        return self.emulation_thread.call(self.emu.rewind, frames)
+    
     def update_speed(self):
         """Update emulation speed"""
         self.emu.set_speed(self.speed_var.get())
     
     def update_frame_skip(self):
         """Update frame skip setting"""
-        self.emu.frame_skip = self.frame_skip_var.get()
+        self.emu.frame_skip = int(float(self.frame_skip_var.get()))
     
     def change_filter(self):
-        """Change graphics filter"""
+        """Change graphics filter (a single filter replaces any chain)"""
+        self.emu.filters.set_chain([])
         self.emu.filters.current_filter = self.current_filter.get()
     
+    def open_filter_chain(self):
+        """Edit the filter pipeline as a comma-separated list"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Filter Chain 🌈")
+        dialog.geometry("420x140")
+        
+        ttk.Label(dialog, text="Filters in order (e.g. hq2x, scanlines, crt_glow):").pack(pady=(10, 2))
+        chain_var = tk.StringVar(value=", ".join(self.emu.filters.get_chain()))
+        ttk.Entry(dialog, textvariable=chain_var).pack(fill=tk.X, padx=10)
+        ttk.Label(dialog, text="Available: " + ", ".join(n for n in LibmeowFilter.FILTERS if n != 'none'),
+                  font=("Arial", 8)).pack(pady=2)
+        
+        def apply_chain():
+            names = [n.strip() for n in chain_var.get().split(",") if n.strip()]
+            self.emu.filters.set_chain(names)
+            self.current_filter.set("none")
+            self.emu.filters.current_filter = "none"
+            self.status_label.config(text="Filters: " + (" → ".join(self.emu.filters.chain) or "none"))
+            dialog.destroy()
+        
+        ttk.Button(dialog, text="Apply ✨", command=apply_chain).pack(pady=5)
+    
+    def toggle_filter_workers(self):
+        """Run filters in background processes (one frame of extra latency)"""
+        workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        # The core thread starts or stops the pool at its next frame
+        self.emu.filter_workers = workers if self.filter_workers_var.get() else 0
+        print(f"[libmeow0.1] Filter workers {'on' if self.emu.filter_workers else 'off'}~ 🧶")
+    
     def toggle_frameskip(self):
         """Toggle auto frameskip"""
-        # Implementation would go here
-        pass
+        self.emu.auto_frameskip = self.auto_frameskip_var.get()
+        if self.emu.auto_frameskip and self.emu.frame_skip == 0:
+            # Adaptive skip needs some headroom to work with
+            self.frame_skip_var.set(4)
+            self.update_frame_skip()
+        print(f"[libmeow0.1] Auto frameskip {'on' if self.emu.auto_frameskip else 'off'}~ ⏩")
     
     def open_cheat_editor(self):
         """Open cheat code editor"""
@@ -1310,7 +3054,7 @@ class CatEMUGUI:
             ttk.Radiobutton(dialog, text=f"Slot {i}", variable=slot_var, value=i).pack()
         
         def save():
-            if self.emu.save_state(slot_var.get()):
+            if self.save_state(slot_var.get()):
                 messagebox.showinfo("Success", f"State saved to slot {slot_var.get()}!")
                 dialog.destroy()
             else:
@@ -1331,7 +3075,7 @@ class CatEMUGUI:
             ttk.Radiobutton(dialog, text=f"Slot {i}", variable=slot_var, value=i).pack()
         
         def load():
-            if self.emu.load_state(slot_var.get()):
+            if self.load_state(slot_var.get()):
                 messagebox.showinfo("Success", f"State loaded from slot {slot_var.get()}!")
                 dialog.destroy()
             else:
@@ -1624,12 +3368,14 @@ F12 - Open Debug Panel
     def update(self):
         """Main update loop"""
         if self.rom_loaded and self.emu.running and not self.emu.paused:
-            # Run one frame
-            frame_data = self.emu.run_frame()
+            # Grab the newest frame from the core thread
+            frame_data = self.emulation_thread.get_latest_frame()
             
-            if frame_data:
+            if frame_data is not None:
                 # Update display
                 self.update_display(frame_data)
+                self.emu.latency.presented(self.emulation_thread.latest_seq)
+                self.update_latency_label()
                 
                 # Update FPS
                 fps = self.emu.ppu.get_fps()
@@ -1646,33 +3392,75 @@ F12 - Open Debug Panel
         # Schedule next update
         self.root.after(self.update_interval, self.update)
     
+    def update_latency_label(self):
+        """Show per-stage input lag percentiles in the status bar (about once a second)"""
+        now = time.time()
+        if now - getattr(self, '_latency_shown', 0) < 1.0:
+            return
+        self._latency_shown = now
+        
+        stats = self.emu.latency.get_stats()
+        if stats['total']['n']:
+            stages = " | ".join(f"{stage} {v['p50']:.0f}/{v['p99']:.0f}" for stage, v in stats.items())
+            self.latency_label.config(text=f"Lag p50/p99 ms: {stages}")
+    
+    def save_latency_report(self):
+        """Dump input latency stats to JSON"""
+        filename = filedialog.asksaveasfilename(
+            title="Save latency report",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if filename:
+            try:
+                self.emu.latency.dump(filename)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save report: {e}")
+    
     def update_display(self, frame_data):
-        """Update canvas with frame data"""
-        # Convert to PhotoImage (simplified - would need proper conversion)
-        # For now, just show a placeholder
-        if not hasattr(self, 'display_image'):
-            # Create a simple colored rectangle for demonstration
-            self.canvas.delete("all")
-            width = self.canvas.winfo_width()
-            height = self.canvas.winfo_height()
-            
-            if width > 1 and height > 1:
-                # Draw a simple representation
-                scale_x = width / 240
-                scale_y = height / 160
-                
-                # Draw some colored rectangles to simulate game
-                colors = ['red', 'green', 'blue', 'yellow', 'purple', 'cyan']
-                for i in range(6):
-                    x1 = i * 40 * scale_x
-                    y1 = 0
-                    x2 = (i + 1) * 40 * scale_x
-                    y2 = height
-                    self.canvas.create_rectangle(x1, y1, x2, y2, 
-                                               fill=colors[i], outline='')
-        
-        # In a real implementation, you would convert frame_data to PhotoImage
-        # and display it on the canvas
+        """Blit the frame into reused PhotoImages, scaled to fit the canvas 🖼️"""
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return
+        
+        # Upscaling filters hand back bigger frames, so derive the size from the data
+        src_scale = max(1, math.isqrt(len(frame_data) // (240 * 160 * 3)))
+        src_w, src_h = 240 * src_scale, 160 * src_scale
+        zoom = max(1, min(width // src_w, height // src_h))
+        
+        # Same frame at the same size? Skip the redraw entirely
+        if self.source_image is None or self.source_image.width() != src_w:
+            self.source_image = tk.PhotoImage(width=src_w, height=src_h)
+            self._ppm_header = f"P6\n{src_w} {src_h}\n255\n".encode()
+        
+        ppm = self._ppm_header + frame_data
+        
+        key = (src_w, zoom, width, height)
+        if key == self._display_key and ppm == self._shown_frame:
+            self.frames_unchanged += 1
+            return
+        
+        self.source_image.put(ppm)
+        
+        if self.display_image is None:
+            self.display_image = tk.PhotoImage()
+            self.canvas.create_image(width // 2, height // 2, image=self.display_image,
+                                     anchor=tk.CENTER, tags="frame")
+        
+        if key != self._display_key:
+            # Resized: shrink the target and re-centre it
+            self.display_image.blank()
+            self.display_image.configure(width=src_w * zoom, height=src_h * zoom)
+            self.canvas.coords("frame", width // 2, height // 2)
+        
+        # Integer zoom straight from the source image, done inside Tk
+        self.display_image.tk.call(self.display_image, 'copy', self.source_image,
+                                   '-zoom', zoom, zoom)
+        
+        self._shown_frame = ppm
+        self._display_key = key
+        self.frames_presented += 1
     
     def update_debug_info(self):
         """Update debug panel information"""
@@ -1732,14 +3520,196 @@ F12 - Open Debug Panel
     
     def run(self):
         """Start the GUI"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.emulation_thread.stop()
 
 # ======================
 # MAIN ENTRY POINT
 # ======================
 
-def main():
+SOUND_TEST_NOTES = (262, 294, 330, 349, 392, 440, 494, 523)  # C major, Hz
+SOUND_TEST_TABLE = 0x02000000   # DirectSound sine table in EWRAM
+
+def drive_sound_test(mmu, frame):
+    """Program the sound registers like a game would, one frame at a time 🎼
+    
+    Everything goes through the MMU write path so APU.write_io sees it: a
+    scale on square 2, a sweep on square 1, a saw on the wave channel, noise
+    hits and a sine on FIFO A fed by timer 0 and DMA1. The pattern repeats
+    every 240 frames and its last second is silent.
+    """
+    io = 0x04000000
+    phase = frame % 240
+    
+    if phase == 0:
+        # Master on, all PSG channels and FIFO A (50%, timer 0) on both sides
+        mmu.write_half(io + APU.SOUNDCNT_X, 0x0080)
+        mmu.write_half(io + APU.SOUNDCNT_L, 0xFF33)
+        mmu.write_half(io + APU.SOUNDCNT_H, 0x0B0A)
+        
+        # Saw wave: fill bank 0 while bank 1 is selected, then play bank 0
+        mmu.write_half(io + APU.SOUND3CNT_L, 0x0040)
+        for i in range(0, 16, 2):
+            mmu.write_half(io + APU.WAVE_RAM + i, (i * 0x11) | ((i + 1) * 0x11) << 8)
+        mmu.write_half(io + APU.SOUND3CNT_L, 0x0080)
+        mmu.write_half(io + APU.SOUND3CNT_H, 0x2000)
+        mmu.write_half(io + APU.SOUND3CNT_X, 0x8000 | (2048 - 65536 // 110))
+        
+        # Sine with a 32-byte period; timer 0 pops 192 bytes per frame
+        for i in range(0, 1024, 4):
+            word = 0
+            for j in range(4):
+                word |= (int(round(64 * math.sin(2 * math.pi * (i + j) / 32))) & 0xFF) << (8 * j)
+            mmu.write_word(SOUND_TEST_TABLE + i, word)
+        mmu.write_half(io + APU.TM0CNT, 0x10000 - 1463)
+        mmu.write_half(io + APU.TM0CNT + 2, 0x0080)
+    elif phase == 180:
+        # Last second: everything off, DirectSound included
+        mmu.write_half(io + APU.DMA_BASES[0] + 10, 0)
+        mmu.write_half(io + APU.TM0CNT + 2, 0)
+        mmu.write_half(io + APU.SOUNDCNT_H, 0x8802)
+        mmu.write_half(io + APU.SOUNDCNT_X, 0)
+    if phase >= 180:
+        return
+    
+    # Re-arm the FIFO DMA at the table start, as games do at vblank
+    base = io + APU.DMA_BASES[0]
+    mmu.write_half(base + 10, 0)
+    mmu.write_word(base, SOUND_TEST_TABLE)
+    mmu.write_word(base + 4, io + APU.FIFO_A)
+    mmu.write_half(base + 10, 0xB640)  # enable, special timing, repeat, 32-bit, fixed destination
+    
+    if phase % 15 == 0:
+        note = SOUND_TEST_NOTES[(phase // 15) % len(SOUND_TEST_NOTES)]
+        mmu.write_half(io + APU.SOUND2CNT_L, 0xF380)         # 50% duty, decaying envelope
+        mmu.write_half(io + APU.SOUND2CNT_H, 0x8000 | (2048 - 131072 // note))
+    if phase % 60 == 0:
+        mmu.write_half(io + APU.SOUND1CNT_L, 0x0027)         # sweep up every 2 steps
+        mmu.write_half(io + APU.SOUND1CNT_H, 0xA740)
+        mmu.write_half(io + APU.SOUND1CNT_X, 0x8000 | (2048 - 131072 // 220))
+    if phase % 30 == 10:
+        mmu.write_half(io + APU.SOUND4CNT_L, 0xC100)         # short hit
+        mmu.write_half(io + APU.SOUND4CNT_H, 0x8000 | 0x0021)
+
+def run_headless(rom_path, bios_path=None, frames=600, seconds=None, dump_frame=None,
+                 filters=None, filter_workers=0, audio_sink=None, until=None, sound_test=False):
+    """Run the core without any GUI and return throughput stats 📊
+    
+    until, if given, is called with the emulator before every frame; the run
+    stops as soon as it returns True. sound_test drives the APU registers
+    with drive_sound_test, since the toy CPU never writes them itself.
+    """
+    emu = CatEMU()
+    if audio_sink is not None:
+        emu.set_audio_sink(audio_sink)
+    if filters:
+        emu.filters.set_chain(filters)
+    emu.filter_workers = filter_workers
+    
+    if bios_path:
+        with open(bios_path, 'rb') as f:
+            emu.mmu.bios[:] = f.read(0x4000).ljust(0x4000, b"\0")
+    
+    if not emu.load_rom(rom_path):
+        return None
+    emu.running = True
+    
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds if seconds else None
+    while frames is None or count < frames:
+        if deadline and time.perf_counter() >= deadline:
+            break
+        if until and until(emu):
+            break
+        if sound_test:
+            drive_sound_test(emu.mmu, count)
+        emu.run_frame()
+        count += 1
+    
+    # Collect the frame still in the filter pool so its cost is counted
+    if emu.filter_pool is not None:
+        emu.current_frame = emu.filter_pool.collect() or emu.current_frame
+        emu.filter_workers = 0
+        emu._sync_filter_pool()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    
+    if dump_frame:
+        with open(dump_frame, 'wb') as f:
+            f.write(b"P6\n240 160\n255\n" + emu.ppu.front)
+    
+    audio = None
+    if emu.audio_output is not None:
+        audio = emu.audio_output.stats()
+        emu.set_audio_sink(None)  # closing flushes file sinks
+        if isinstance(audio_sink, LibmeowWavSink):
+            audio['checksum'] = audio_sink.checksum
+    
+    return {
+        'frames': count,
+        'seconds': elapsed,
+        'fps': count / elapsed,
+        'instructions': emu.instructions,
+        'ips': emu.instructions / elapsed,
+        'frame_crc': zlib.crc32(emu.ppu.front),
+        'audio': audio
+    }
+
+def main(argv=None):
     """Main function"""
+    import argparse
+    parser = argparse.ArgumentParser(description="CatGBAEmuHDRV0 with libmeow0.1")
+    parser.add_argument('rom', nargs='?', help="ROM to load")
+    parser.add_argument('--bios', help="BIOS image")
+    parser.add_argument('--headless', action='store_true', help="run without Tk and report throughput")
+    parser.add_argument('--frames', type=int, help="frames to run headless (default 600, unlimited with --seconds)")
+    parser.add_argument('--seconds', type=float, help="stop after this much wall time")
+    parser.add_argument('--dump-frame', metavar='PPM', help="write the final frame as PPM")
+    parser.add_argument('--until-frame-crc', type=lambda v: int(v, 16), metavar='CRC',
+                        help="stop once the displayed frame has this CRC32 (hex)")
+    parser.add_argument('--filter', help="comma-separated filter chain, e.g. hq2x,scanlines")
+    parser.add_argument('--filter-workers', type=int, default=0, metavar='N',
+                        help="run the filter chain in N worker processes")
+    parser.add_argument('--audio-raw', metavar='PCM',
+                        help="write audio as raw 16-bit stereo PCM at 44100 Hz")
+    parser.add_argument('--wav', help="record audio to a WAV file")
+    parser.add_argument('--audio-checksums', metavar='TXT',
+                        help="write one CRC32 of the audio per frame (for regression tests)")
+    parser.add_argument('--sound-test', action='store_true',
+                        help="drive the sound registers with a test pattern while running headless")
+    args = parser.parse_args(argv)
+    
+    if args.headless:
+        if not args.rom:
+            parser.error("--headless needs a ROM")
+        frames = args.frames if args.frames is not None else (None if args.seconds else 600)
+        chain = [name.strip() for name in args.filter.split(",")] if args.filter else None
+        sink = None
+        if args.wav or args.audio_checksums:
+            sink = LibmeowWavSink(args.wav, checksums=bool(args.audio_checksums))
+        elif args.audio_raw:
+            sink = LibmeowFileSink(args.audio_raw)
+        until = None
+        if args.until_frame_crc is not None:
+            until = lambda emu: zlib.crc32(emu.ppu.front) == args.until_frame_crc
+        stats = run_headless(args.rom, args.bios, frames, args.seconds, args.dump_frame,
+                             chain, args.filter_workers, sink, until, args.sound_test)
+        if stats is None:
+            return 1
+        print(f"[libmeow0.1] {stats['frames']} frames in {stats['seconds']:.2f}s | "
+              f"{stats['fps']:.2f} fps | {stats['ips'] / 1e6:.3f} MIPS | frame CRC {stats['frame_crc']:08x} 📊")
+        if stats['audio']:
+            print(f"[libmeow0.1] Audio: {stats['audio']['frames_out']} frames out | "
+                  f"{stats['audio']['underruns']} underruns | {stats['audio']['dropped']} dropped 🎧")
+        if args.audio_checksums:
+            with open(args.audio_checksums, 'w') as f:
+                f.writelines(f"{crc:08x}\n" for crc in sink.checksums)
+        if stats['audio'] and 'checksum' in stats['audio']:
+            print(f"[libmeow0.1] Audio checksum: {stats['audio']['checksum']:08x} 🔏")
+        return 0
+    
     print("""
     ╔═══════════════════════════════════════════╗
     ║   CatGBAEmuHDRV0 with libmeow0.1 Core     ║
@@ -1748,7 +3718,13 @@ def main():
     """)
     
     gui = CatEMUGUI()
+    if args.bios:
+        with open(args.bios, 'rb') as f:
+            gui.emu.mmu.bios[:] = f.read(0x4000).ljust(0x4000, b"\0")
+    if args.rom:
+        gui.open_rom(args.rom)
     gui.run()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())